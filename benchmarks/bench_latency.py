@@ -0,0 +1,212 @@
+"""
+End-to-end latency benchmark for the voice pipeline.
+
+Drives the real VoiceAssistantApp headlessly: WAV fixtures are fed through
+the normal capture callback, OpenAI transcription and chat go to a local fake
+server with configurable latencies and token rate, and TTS is replaced by a
+timing sink. Reports time-to-first-token, time-to-first-audio and total turn
+time over many runs, straight from the app's own latency tracer.
+
+Run from the project root (Tk needs a display; use xvfb-run on CI):
+
+    python -m benchmarks.bench_latency --runs 20
+    python -m benchmarks.bench_latency --wav fixtures/question.wav --speed 4
+"""
+import argparse
+import os
+import threading
+import time
+import wave
+from types import SimpleNamespace
+import numpy as np
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+REPORTED_SPANS = ["time_to_first_token", "time_to_first_audio", "turn_total"]
+
+
+def load_wav(path):
+    """
+    Read a 16-bit PCM WAV file as mono int16 plus its sample rate.
+    """
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV fixtures are supported")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return data, rate
+
+
+def synthetic_utterance(sample_rate, seconds=2.0, seed=0):
+    """
+    Speech-like fixture for runs without recordings: syllable-rate modulated
+    harmonics over a low noise floor, framed by short silences.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 280, 420, 560)))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+    speech = 6000 * envelope * voice / 2.1
+    silence = np.zeros(int(sample_rate * 0.3))
+    signal = np.concatenate([silence, speech, silence])
+    signal += rng.normal(0, 30, len(signal))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+class WavInputStream:
+    """
+    Drop-in for sounddevice.InputStream that plays a fixture into the capture
+    callback at ``speed`` times real time, then keeps delivering near-silence
+    until stopped, so the app's VAD can end the turn on its own.
+    """
+
+    def __init__(self, fixture, speed=1.0, samplerate=44100, channels=1, dtype="int16",
+                 blocksize=1024, callback=None, **kwargs):
+        self.fixture = fixture
+        self.speed = speed
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._running.set()
+        self._thread = threading.Thread(target=self._feed, daemon=True)
+        self._thread.start()
+
+    def _feed(self):
+        rng = np.random.default_rng(1)
+        interval = self.blocksize / self.samplerate / self.speed
+        position = 0
+        next_time = time.monotonic()
+        while self._running.is_set():
+            block = self.fixture[position:position + self.blocksize]
+            position += self.blocksize
+            if len(block) < self.blocksize:
+                tail = rng.normal(0, 30, self.blocksize - len(block)).astype(np.int16)
+                block = np.concatenate([block, tail])
+            self.callback(block.reshape(-1, 1), self.blocksize, None, None)
+            next_time += interval
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+class TimingSink:
+    """
+    Stands in for the TTS stage: consumes playback sessions from
+    streaming_voice.tts_queue, marks first audio after ``tts_latency``
+    seconds per chunk and closes each turn's trace.
+    """
+
+    def __init__(self, sessions, tts_latency=0.0):
+        self.sessions = sessions
+        self.tts_latency = tts_latency
+        self.turns = []  # finished TurnTrace dicts
+        self.turn_done = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._consume, daemon=True).start()
+
+    def _consume(self):
+        while True:
+            session = self.sessions.get()
+            if session is None:
+                break
+            while session.get() is not None:
+                if self.tts_latency:
+                    time.sleep(self.tts_latency)
+                session.mark("first_audio")
+            session.end_trace()
+            if session.trace is not None:
+                self.turns.append(session.trace.to_dict())
+            self.turn_done.set()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay fixtures through Sophie and report latency.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--wav", action="append", default=[], help="16-bit PCM WAV fixture (repeatable)")
+    parser.add_argument("--speed", type=float, default=1.0, help="capture playback speed vs real time")
+    parser.add_argument("--stt-latency", type=float, default=0.25, help="fake transcription latency, s")
+    parser.add_argument("--first-token-latency", type=float, default=0.35, help="fake chat latency, s")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="simulated synthesis time per chunk, s")
+    parser.add_argument("--trace-file", default="", help="also append turn traces to this JSONL file")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-run timeout, s")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    server = FakeOpenAIServer(
+        stt_latency=args.stt_latency,
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+    ).start()
+
+    # Configure the app before importing it: no real TTS, no real keys, and
+    # no warm-up requests to the real APIs.
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["OPENAI_API_BASE"] = server.base_url
+    os.environ["SOPHIE_WARM_UP"] = "0"
+    os.environ["SOPHIE_TTS_BACKEND"] = "none"
+    os.environ["SOPHIE_STT_BACKEND"] = "openai"
+    os.environ["SOPHIE_TRACE_FILE"] = args.trace_file
+    import openai
+    import main as sophie
+    import streaming_voice
+
+    openai.api_base = server.base_url
+    fixtures = [load_wav(path) for path in args.wav] or [(synthetic_utterance(sophie.SAMPLE_RATE), sophie.SAMPLE_RATE)]
+    fixtures = [sophie.resample_pcm(data, rate, sophie.SAMPLE_RATE) for data, rate in fixtures]
+
+    sink = TimingSink(streaming_voice.tts_queue, args.tts_latency)
+    sink.start()
+
+    app = sophie.VoiceAssistantApp()
+    app.withdraw()
+    failures = []
+
+    def drive():
+        for run in range(args.runs):
+            fixture = fixtures[run % len(fixtures)]
+            # Capture comes from the fixture instead of the microphone.
+            sophie.sd = SimpleNamespace(InputStream=lambda **kw: WavInputStream(fixture, args.speed, **kw))
+            sink.turn_done.clear()
+            app.after(0, app.start_recording_handler)
+            if not sink.turn_done.wait(args.timeout):
+                failures.append(run)
+                print(f"run {run}: timed out")
+                continue
+            turn = sink.turns[-1]["spans_ms"]
+            print(f"run {run:3d}: " + "  ".join(f"{name}={turn.get(name, float('nan')):8.1f} ms"
+                                                 for name in REPORTED_SPANS))
+        app.after(0, app.quit)
+
+    threading.Thread(target=drive, daemon=True).start()
+    app.mainloop()
+
+    summary = sophie.tracer.summary()
+    print(f"\n{args.runs - len(failures)}/{args.runs} runs, "
+          f"{server.requests['transcriptions']} transcription and {server.requests['chat']} chat requests")
+    for name in REPORTED_SPANS:
+        stats = summary.get(name)
+        if stats:
+            print(f"{name:<22} p50={stats['p50']:8.1f} ms  p95={stats['p95']:8.1f} ms  p99={stats['p99']:8.1f} ms")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
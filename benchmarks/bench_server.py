@@ -0,0 +1,144 @@
+"""
+Throughput benchmark for the multi-session server.
+
+Starts server.py in a subprocess against a local fake OpenAI server (text
+only, no TTS), connects ``--clients`` concurrent WebSocket sessions that
+each speak ``--turns`` utterances, and reports completed turns per second,
+server CPU seconds per turn and turns per core-second, plus the server's
+own latency percentiles.
+
+Run from the project root:
+
+    python -m benchmarks.bench_server --clients 50 --turns 5 --speed 4
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import aiohttp
+import numpy as np
+
+from benchmarks.bench_latency import REPORTED_SPANS, load_wav, synthetic_utterance
+from benchmarks.fake_openai import FakeOpenAIServer
+from src.audio import resample_pcm
+
+SAMPLE_RATE = 16000
+BLOCK_MS = 20
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load Sophie's server with concurrent voice sessions.")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3, help="utterances per client")
+    parser.add_argument("--wav", default=None, help="16-bit PCM WAV fixture")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio streaming speed vs real time (latency spans assume 1)")
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--first-token-latency", type=float, default=0.35)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-turn timeout, s")
+    return parser.parse_args()
+
+
+async def client(url, fixture, turns, speed, timeout, results):
+    block = SAMPLE_RATE * BLOCK_MS // 1000
+    rng = np.random.default_rng()
+    async with aiohttp.ClientSession() as http, http.ws_connect(url, max_msg_size=0) as ws:
+        for _ in range(turns):
+            turn_end = asyncio.ensure_future(wait_turn_end(ws))
+            position = 0
+            next_time = time.monotonic()
+            started = time.monotonic()
+            while not turn_end.done():
+                if time.monotonic() - started > timeout:
+                    turn_end.cancel()
+                    results.append(None)
+                    break
+                if position < len(fixture):
+                    chunk = fixture[position:position + block]
+                    position += block
+                else:
+                    chunk = rng.normal(0, 30, block).astype(np.int16)  # near-silence ends the turn
+                await ws.send_bytes(chunk.tobytes())
+                next_time += BLOCK_MS / 1000 / speed
+                await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+            else:
+                results.append(turn_end.result())
+
+
+async def wait_turn_end(ws):
+    async for msg in ws:
+        if msg.type == aiohttp.WSMsgType.TEXT:
+            message = msg.json()
+            if message["type"] == "turn_end":
+                return message
+
+
+async def fetch_stats(base):
+    async with aiohttp.ClientSession() as http, http.get(f"{base}/stats") as response:
+        return await response.json()
+
+
+async def wait_for_server(base, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            return await fetch_stats(base)
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def run(args, fixture):
+    base = f"http://127.0.0.1:{args.port}"
+    url = f"ws://127.0.0.1:{args.port}/ws?sample_rate={SAMPLE_RATE}"
+    fake = FakeOpenAIServer(
+        stt_latency=args.stt_latency,
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+    ).start()
+    env = dict(os.environ, OPENAI_API_KEY="sk-benchmark", OPENAI_API_BASE=fake.base_url,
+               SOPHIE_STT_BACKEND="openai", SOPHIE_SERVER_TTS="none", SOPHIE_TRACE_FILE="", SOPHIE_WARM_UP="0")
+    process = subprocess.Popen([sys.executable, "server.py", "--port", str(args.port)], env=env)
+    try:
+        before = await wait_for_server(base, process)
+        results = []
+        started = time.monotonic()
+        await asyncio.gather(*(client(url, fixture, args.turns, args.speed, args.timeout, results)
+                               for _ in range(args.clients)))
+        wall = time.monotonic() - started
+        after = await fetch_stats(base)
+    finally:
+        process.terminate()
+        process.wait()
+        fake.stop()
+
+    done = [r for r in results if r is not None]
+    cpu = after["cpu_s"] - before["cpu_s"]
+    print(f"{len(done)}/{len(results)} turns from {args.clients} clients in {wall:.1f} s "
+          f"({len(done) / wall:.2f} turns/s)")
+    if done:
+        print(f"server CPU {cpu:.2f} s on {after['cpus']} cores: {cpu / len(done) * 1000:.1f} ms/turn, "
+              f"{len(done) / cpu if cpu else float('inf'):.1f} turns per core-second")
+    for name in REPORTED_SPANS:
+        stats = after["latency_ms"].get(name)
+        if stats:
+            print(f"{name:<22} p50={stats['p50']:8.1f} ms  p95={stats['p95']:8.1f} ms  p99={stats['p99']:8.1f} ms")
+
+
+def main():
+    args = parse_args()
+    if args.wav:
+        data, rate = load_wav(args.wav)
+        fixture = resample_pcm(data, rate, SAMPLE_RATE)
+    else:
+        fixture = synthetic_utterance(SAMPLE_RATE)
+    asyncio.run(run(args, fixture))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "[EMOTION]warm[/EMOTION]Sure, I can help with that. Tomorrow looks clear from nine to eleven, "
+    "so a morning meeting works. Dr. Smith is free after ten, e.g. at ten thirty. Want me to book it?"
+)
+
+
+class FakeOpenAIServer:
+    """
+    Local stand-in for the OpenAI transcription and chat endpoints, with
+    configurable latencies and token rate. Point ``openai.api_base`` at
+    ``base_url`` to use it.
+    """
+
+    def __init__(self, transcript="Can you find a time for a meeting with Dr. Smith tomorrow?",
+                 reply=DEFAULT_REPLY, stt_latency=0.25, first_token_latency=0.35,
+                 tokens_per_second=40.0, host="127.0.0.1", port=0):
+        self.transcript = transcript
+        self.reply = reply
+        self.stt_latency = stt_latency
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.requests = {"transcriptions": 0, "chat": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def tokens(self):
+        # Roughly what the chat API streams: a word plus its leading space.
+        words = self.reply.split(" ")
+        return [words[0]] + [" " + word for word in words[1:]]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                if self.path.endswith("/audio/transcriptions"):
+                    fake.requests["transcriptions"] += 1
+                    time.sleep(fake.stt_latency)
+                    self.send_json({"text": fake.transcript})
+                elif self.path.endswith("/chat/completions"):
+                    fake.requests["chat"] += 1
+                    request = json.loads(body or b"{}")
+                    if request.get("stream"):
+                        self.stream_chat()
+                    else:
+                        time.sleep(fake.first_token_latency)
+                        self.send_json({
+                            "id": "chatcmpl-fake", "object": "chat.completion",
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant", "content": fake.reply}}],
+                        })
+                else:
+                    self.send_error(404)
+
+            def send_json(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream_chat(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                time.sleep(fake.first_token_latency)
+                try:
+                    for token in fake.tokens():
+                        self.send_event({
+                            "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        })
+                        time.sleep(1.0 / fake.tokens_per_second)
+                    self.send_event({
+                        "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    })
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client cancelled the stream
+                self.close_connection = True
+
+            def send_event(self, payload):
+                self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+                self.wfile.flush()
+
+        return Handler
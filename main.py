@@ -3,14 +3,12 @@
 import os
 import time
 import threading
-import tempfile
-import wave
+from concurrent.futures import Future
 import numpy as np
 import sounddevice as sd
 import tkinter as tk
 from tkinter import ttk
 import openai
-from scipy.io.wavfile import write
 from dotenv import load_dotenv
 import asyncio
 from queue import Queue
@@ -19,7 +17,14 @@ import pyttsx3
 import re
 
 # Import our streaming TTS runner.
-from streaming_voice import stream_gpt4_response
+from streaming_voice import AGENT_MODE, ASYNC_CORE, astream_gpt4_response, open_chat_stream, runtime, stream_gpt4_response
+from src.audio import AudioRingBuffer, VoiceActivityDetector, resample_pcm
+from src.transcription import AsyncTranscriptionPipeline, StreamingTranscript, TranscriptionPipeline, build_transcriber
+from src.llm import Speculator
+from src.tts import PlaybackSession
+from src.tracing import Tracer
+from src.runtime import TkBridge
+from src.connections import warm_up, warm_up_async
 
 # Load environment variables and OpenAI API key.
 load_dotenv()
@@ -27,35 +32,77 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 if not openai.api_key:
     raise Exception("OPENAI_API_KEY not set in .env file.")
 
+# Open keep-alive connections to the APIs when the app starts rather than on
+# the first turn. Off for benchmarks, which must not touch the real APIs.
+WARM_UP = os.getenv("SOPHIE_WARM_UP", "1") == "1"
+
 # Configuration for recording.
 SAMPLE_RATE = 44100  # Hz
 CHANNELS = 1
 DTYPE = 'int16'
 BLOCK_SIZE = 1024  # samples per block
+RING_SECONDS = 30  # audio kept in memory; older samples are overwritten
+
+# Voice activity detection: utterances are cut at natural pauses and the turn
+# ends on its own after END_OF_TURN_MS of trailing silence.
+VAD_POLL_INTERVAL = 0.1  # seconds between VAD passes over new audio
+VAD_PAUSE_MS = 500
+END_OF_TURN_MS = 1500
+
+# Speech is downsampled to 16 kHz mono before upload; recognizers gain
+# nothing from the full capture rate. Use "flac" for smaller uploads.
+TRANSCRIBE_RATE = 16000
+UPLOAD_FORMAT = "wav"
+
+# Speech-to-text engine: "openai" (hosted API) or "local" (faster-whisper,
+# runs offline and skips the network round trip).
+STT_BACKEND = os.getenv("SOPHIE_STT_BACKEND", "openai")
+
+# Live transcription runs chunks in parallel; submitting blocks once this many
+# are outstanding.
+TRANSCRIBE_WORKERS = 3
+MAX_IN_FLIGHT_CHUNKS = 4
+
+# Live transcript mode. "chunked" transcribes each utterance once, in
+# parallel. "streaming" re-decodes a short sliding window while the user
+# speaks and only commits words two decodes agree on, so live text is
+# accurate at chunk edges without re-transcribing the whole utterance.
+LIVE_TRANSCRIPTION = os.getenv("SOPHIE_LIVE_TRANSCRIPTION", "chunked")
+STREAM_STEP = 0.5  # seconds of new speech between streaming re-decodes
+STREAM_WINDOW = 8.0  # longest window re-decoded in streaming mode, seconds
+
+# Speculative responses: once VAD hears the user pause, the LLM request is
+# started on the transcript so far. More speech cancels it; if the final
+# transcript matches, the in-flight stream is reused instead of re-requested.
+# Not with SOPHIE_AGENT=1: an agent turn updates its memory and may act.
+SPECULATIVE_RESPONSES = os.getenv("SOPHIE_SPECULATIVE", "1") == "1" and not AGENT_MODE
+
+# SOPHIE_ASYNC_CORE=1 (see streaming_voice.py) runs each turn as one task on
+# the shared event loop instead of a set of threads. Speculative responses
+# are only used by the threaded path.
+
+# Per-turn latency tracing: finished turns are appended to this JSONL file
+# and summarized as p50/p95/p99 on exit. Set SOPHIE_TRACE_FILE= to disable.
+tracer = Tracer(os.getenv("SOPHIE_TRACE_FILE", "latency_traces.jsonl") or None)
 
 # Global recording state and buffer.
 recording_active = False
-audio_buffer = []  # List of NumPy arrays (each block)
+# Preallocated ring of captured samples, indexed by absolute sample position.
+audio_ring = AudioRingBuffer(SAMPLE_RATE * RING_SECONDS, CHANNELS, DTYPE)
 latest_amplitude = 0.0  # Used for waveform display
 
-# Lock for thread-safe updates.
-import threading
-buffer_lock = threading.Lock()
-
-# sounddevice callback: append incoming audio block and update amplitude.
+# sounddevice callback: copy incoming audio block into the ring and update amplitude.
 def audio_callback(indata, frames, time_info, status):
-    global audio_buffer, latest_amplitude
+    global latest_amplitude
     if recording_active:
-        with buffer_lock:
-            audio_buffer.append(indata.copy())
+        audio_ring.write(indata)
         latest_amplitude = np.abs(indata).mean()
 
 # Function to start recording.
 def start_recording():
-    global recording_active, audio_buffer
+    global recording_active
+    audio_ring.reset()  # clear previous recording
     recording_active = True
-    with buffer_lock:
-        audio_buffer = []  # clear previous recording
     stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype=DTYPE,
                             blocksize=BLOCK_SIZE, callback=audio_callback)
     stream.start()
@@ -68,37 +115,35 @@ def stop_recording(stream):
     stream.stop()
     stream.close()
 
-# Save accumulated audio to a temporary WAV file.
-def save_audio_to_wav():
-    with buffer_lock:
-        if not audio_buffer:
-            return None
-        data = np.concatenate(audio_buffer, axis=0)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-        wav_path = f.name
-    with wave.open(wav_path, "wb") as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)  # 16-bit PCM = 2 bytes per sample.
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(data.tobytes())
-    return wav_path
-
-# Transcribe audio using OpenAI Whisper.
-def transcribe_audio(wav_path):
-    with open(wav_path, "rb") as audio_file:
-        # Old
-        # transcript = openai.Audio.transcribe("whisper-1", audio_file)
-        # New
-        transcript = openai.Audio.transcribe("gpt-4o-mini-transcribe", audio_file)
-    return transcript["text"].strip()
+# Build the configured speech-to-text engine.
+def create_transcriber(backend=None):
+    return build_transcriber(backend or STT_BACKEND, audio_format=UPLOAD_FORMAT, num_workers=TRANSCRIBE_WORKERS)
 
 # Tkinter-based GUI application.
 class VoiceAssistantApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, transcriber=None):
         super().__init__()
-        self.processed_audio_index = 0  # Track processed audio chunks
+        if WARM_UP:
+            warm_up()
+            if ASYNC_CORE:
+                runtime.submit(warm_up_async())
+        # Speech-to-text backend; any BaseTranscriber can be plugged in.
+        self.transcriber = transcriber if transcriber is not None else create_transcriber()
+        self.processed_audio_index = 0  # Absolute sample position already transcribed
         self.transcription = ""         # Accumulated transcription
         self.transcribing_active = False
+        self.vad = VoiceActivityDetector(SAMPLE_RATE, pause_ms=VAD_PAUSE_MS, end_of_turn_ms=END_OF_TURN_MS)
+        self.transcription_thread = None
+        self.pipeline = None
+        self.live_transcript = None  # StreamingTranscript in streaming mode
+        self.fed_until = 0  # absolute sample position fed to the live transcript
+        self.speculator = Speculator(open_chat_stream)
+        self.playback = None  # PlaybackSession of the turn being spoken
+        self.trace = None  # TurnTrace of the current turn
+        self.turn_future = None  # async core: the running turn task
+        self.capture_closed = None  # async core: resolved when recording stops
+        # Everything that runs off the Tk thread reaches the widgets through here.
+        self.ui = TkBridge(self)
 
         self.title("Voice Assistant")
         self.geometry("500x350")
@@ -134,91 +179,209 @@ class VoiceAssistantApp(tk.Tk):
     def start_recording_handler(self):
         global recording_active
         if not recording_active:
+            # Barge-in: talking over Sophie stops her and the answer behind it.
+            if self.playback is not None:
+                self.playback.cancel()
+            self.trace = tracer.start_turn()
             # Reset transcription state
             self.processed_audio_index = 0
             self.transcription = ""
             self.transcribing_active = True
-            
+            self.vad.reset()
+            self.speculator.cancel()
+            if LIVE_TRANSCRIPTION == "streaming":
+                self.live_transcript = StreamingTranscript(self.transcriber, max_window=STREAM_WINDOW)
+                self.fed_until = 0
+
             self.status_var.set("Recording... Speak now!")
             self.rec_stream = start_recording()
+            if ASYNC_CORE:
+                self.capture_closed = Future()
+                self.turn_future = runtime.submit(self.run_turn())
+                self.turn_future.add_done_callback(self.on_turn_done)
+                return
+            self.pipeline = TranscriptionPipeline(
+                self.transcriber, on_result=self.on_chunk_transcribed,
+                max_workers=TRANSCRIBE_WORKERS, max_in_flight=MAX_IN_FLIGHT_CHUNKS,
+            )
             # Start real-time transcription
-            threading.Thread(target=self.realtime_transcription_loop, daemon=True).start()
+            self.transcription_thread = threading.Thread(target=self.realtime_transcription_loop, daemon=True)
+            self.transcription_thread.start()
 
     # In realtime_transcription_loop method:
     def realtime_transcription_loop(self):
         while recording_active and self.transcribing_active:
-            time.sleep(1)
-            with buffer_lock:
-                current_audio = audio_buffer[self.processed_audio_index:]
-                if not current_audio:
-                    continue
-                data = np.concatenate(current_audio, axis=0)
-            
-            # Create temp file with manual cleanup
-            temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            wav_path = temp_file.name
-            temp_file.close()  # Release handle immediately
-            
-            try:
-                write(wav_path, SAMPLE_RATE, data)
-                chunk_text = transcribe_audio(wav_path)
-                self.transcription += chunk_text + " "
-                self.status_var.set(f"Real-time: {self.transcription}")
-                self.processed_audio_index += len(current_audio)
-            except Exception as e:
-                print(f"Chunk error: {e}")
-            finally:
-                os.remove(wav_path)  # Clean up manually
+            time.sleep(VAD_POLL_INTERVAL)
+            self.handle_segments(self.vad.update(audio_ring))
+            if SPECULATIVE_RESPONSES:
+                self.update_speculation()
+            if self.vad.end_of_turn:
+                # Enough trailing silence: submit without waiting for the button.
+                self.end_of_turn()
+                break
+
+    def end_of_turn(self):
+        self.trace.mark("end_of_speech", at=self.vad.speech_end_time())
+        self.ui.post(self.stop_and_process_handler)
+
+    def update_speculation(self):
+        if self.vad.in_speech:
+            # The user kept talking; whatever was started is stale.
+            self.speculator.cancel()
+        elif self.vad.heard_speech and self.pipeline.idle:
+            # End of speech with the transcript fully caught up.
+            self.speculator.speculate(self.transcription)
+
+    def handle_segments(self, segments):
+        if self.live_transcript is None:
+            # Only whole utterances, cut at pauses, are sent for transcription.
+            for segment in segments:
+                self.transcribe_segment(segment)
+            return
+        for segment in segments:
+            self.feed_live_transcript(segment.start, segment.end, finish=True)
+        # Re-decode the utterance in progress every STREAM_STEP of new speech.
+        if self.vad.in_speech:
+            start = max(self.vad.speech_start - self.vad.pad, self.fed_until)
+            if self.vad.position - start >= STREAM_STEP * SAMPLE_RATE:
+                self.feed_live_transcript(start, self.vad.position)
+
+    def feed_live_transcript(self, start, end, finish=False):
+        # Never feed audio twice; silence between utterances is skipped.
+        start = max(start, self.fed_until)
+        pcm = resample_pcm(audio_ring.views(start, end), SAMPLE_RATE, TRANSCRIBE_RATE)
+        try:
+            if finish:
+                self.live_transcript.finish(pcm, TRANSCRIBE_RATE, start / SAMPLE_RATE)
+            else:
+                self.live_transcript.update(pcm, TRANSCRIBE_RATE, start / SAMPLE_RATE)
+        except Exception as e:
+            print(f"Chunk error: {e}")
+        self.fed_until = self.processed_audio_index = end
+        self.transcription = self.live_transcript.committed_text
+        self.set_status(f"Real-time: {self.live_transcript.text}")
+
+    def segment_pcm(self, segment):
+        # Ring windows are resampled straight into a compact 16 kHz copy, so
+        # in-flight chunks hold ~2.75x less memory and upload fewer bytes.
+        views = audio_ring.views(segment.start, segment.end)
+        return resample_pcm(views, SAMPLE_RATE, TRANSCRIBE_RATE) if views else None
+
+    def transcribe_segment(self, segment):
+        pcm = self.segment_pcm(segment)
+        if pcm is not None:
+            # Blocks while too many chunks are in flight.
+            self.pipeline.submit(pcm, TRANSCRIBE_RATE, tag=segment)
+
+    # Called by the pipeline in speaking order, whatever order chunks finish in.
+    def on_chunk_transcribed(self, chunk_text, segment):
+        if chunk_text:
+            self.transcription += chunk_text + " "
+            self.set_status(f"Real-time: {self.transcription}")
+        self.processed_audio_index = segment.end
 
     # In stop_and_process_handler:
     def stop_and_process_handler(self):
         if recording_active and self.rec_stream is not None:
+            self.trace.mark("end_of_speech")
             self.transcribing_active = False
             stop_recording(self.rec_stream)
-            
-            with buffer_lock:
-                current_audio = audio_buffer[self.processed_audio_index:]
-                if current_audio:
-                    data = np.concatenate(current_audio, axis=0)
-                    temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-                    wav_path = temp_file.name
-                    temp_file.close()
-                    
-                    try:
-                        write(wav_path, SAMPLE_RATE, data)
-                        self.transcription += transcribe_audio(wav_path)
-                    finally:
-                        os.remove(wav_path)
-            
             self.status_var.set("Processing final response...")
-            threading.Thread(target=self.process_recording, daemon=True).start()
+            if ASYNC_CORE:
+                self.capture_closed.set_result(True)  # the turn task takes it from here
+                return
+            # Finish off the tail in the background so the UI thread never
+            # blocks on the transcription worker.
+            threading.Thread(target=self.finish_turn, daemon=True).start()
 
-    def process_recording(self):
-        # wav_path = save_audio_to_wav()
-        # Use real-time accumulated transcription
-        transcribed_text = self.transcription.strip()
-        
+    def finish_turn(self):
+        if self.transcription_thread is not None:
+            self.transcription_thread.join()
+
+        self.handle_segments(self.vad.close(audio_ring))
+        self.pipeline.drain()
+        self.pipeline.close()
+        self.trace.mark("transcription_done")
+
+        # Reuse the speculative stream if it was made for this exact transcript.
+        response = self.speculator.take(self.transcription)
+        self.process_recording(response)
+
+    def process_recording(self, response=None):
+        transcribed_text = self.start_reply()
         if not transcribed_text:
-            self.status_var.set("No speech detected")
             return
-
-        # Generate response with existing code
-        self.status_var.set("Generating response...")
-        
-        def on_sentence(sentence):
-            self.status_var.set(f"Speaking: {sentence}")
-            
         try:
             threading.Thread(
                 target=stream_gpt4_response,
-                args=(transcribed_text, on_sentence),
+                args=(transcribed_text, self.on_sentence, response, self.playback),
                 daemon=True
             ).start()
         except Exception as e:
-            self.status_var.set(f"Error: {e}")
-        
-        # os.remove(wav_path)
-        
+            self.set_status(f"Error: {e}")
+
+    def start_reply(self):
+        # The final transcript, with a playback session ready for the reply;
+        # empty when nothing was said, which ends the turn.
+        transcribed_text = self.transcription.strip()
+        if not transcribed_text:
+            self.set_status("No speech detected")
+            self.trace.end(cancelled=True)
+            return ""
+        self.set_status("Generating response...")
+        self.playback = PlaybackSession(trace=self.trace)
+        return transcribed_text
+
+    def on_sentence(self, sentence):
+        self.set_status(f"Speaking: {sentence}")
+
+    def set_status(self, text):
+        # Safe from any thread or the event loop.
+        self.ui.post(self.status_var.set, text)
+
+    # Async core: one task per turn on the shared event loop.
+    async def run_turn(self):
+        self.pipeline = AsyncTranscriptionPipeline(
+            self.transcriber, on_result=self.on_chunk_transcribed, max_in_flight=MAX_IN_FLIGHT_CHUNKS,
+        )
+        while not self.capture_closed.done():
+            await asyncio.sleep(VAD_POLL_INTERVAL)
+            await self.ahandle_segments(self.vad.update(audio_ring))
+            if self.vad.end_of_turn:
+                self.end_of_turn()
+                break
+        await asyncio.wrap_future(self.capture_closed)
+
+        await self.ahandle_segments(self.vad.close(audio_ring))
+        await self.pipeline.drain()
+        self.pipeline.close()
+        self.trace.mark("transcription_done")
+
+        transcribed_text = self.start_reply()
+        if transcribed_text:
+            await astream_gpt4_response(transcribed_text, self.on_sentence, self.playback)
+
+    async def ahandle_segments(self, segments):
+        if self.live_transcript is not None:
+            # Local agreement decodes synchronously; keep it off the loop.
+            await asyncio.to_thread(self.handle_segments, segments)
+            return
+        for segment in segments:
+            pcm = self.segment_pcm(segment)
+            if pcm is not None:
+                await self.pipeline.submit(pcm, TRANSCRIBE_RATE, tag=segment)
+
+    def on_turn_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Turn error: {future.exception()}")
+            self.set_status(f"Error: {future.exception()}")
+
+    def destroy(self):
+        summary = tracer.format_summary()
+        if summary:
+            print("Latency summary:\n" + summary)
+        super().destroy()
+
 if __name__ == "__main__":
     app = VoiceAssistantApp()
     app.mainloop()
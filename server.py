@@ -0,0 +1,338 @@
+"""
+Headless multi-session server for Sophie.
+
+Each WebSocket connection is an independent voice session with its own
+capture ring, VAD, transcript, reply and trace. The speech-to-text engine,
+the chat client, the synthesizer and the worker threads are shared by all
+sessions, and concurrency limits apply across the whole process.
+
+Protocol on ws://HOST:PORT/ws?sample_rate=16000:
+
+  client -> server  binary   int16 mono PCM at the declared sample rate
+                    text     {"type": "end"}     end the turn now (push-to-talk)
+                             {"type": "cancel"}  stop the reply being spoken
+  server -> client  text     {"type": "transcript", "text", "final"}
+                             {"type": "sentence", "emotion", "text"}
+                             {"type": "audio", "text", "sample_rate", "samples"}
+                             {"type": "turn_end", "turn", "cancelled", "spans_ms"}
+                             {"type": "error", "message"}  unreadable frame
+                    binary   int16 mono PCM of the preceding "audio" message
+
+A sample_rate outside MIN_SAMPLE_RATE..MAX_SAMPLE_RATE is refused with 400
+before the upgrade. Binary frames must hold whole samples (an even number of
+bytes); other frames are reported and dropped.
+
+Turns end on their own after END_OF_TURN_MS of silence. Speaking while a
+reply is playing interrupts it (barge-in). GET /stats reports sessions,
+completed turns, process CPU time and latency percentiles, for measuring
+throughput per core.
+
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import openai
+from aiohttp import WSMsgType, web
+from dotenv import load_dotenv
+
+# The server speaks through its own per-session TTS, never the desktop one.
+os.environ["SOPHIE_TTS_BACKEND"] = "none"
+os.environ["SOPHIE_ASYNC_CORE"] = "0"
+# Plain chat only: the agent's memory and tools belong to a single user.
+os.environ["SOPHIE_AGENT"] = "0"
+from streaming_voice import EMOTION_SETTINGS, EDGE_VOICE, CHAT_TIMEOUT, stream_reply
+from src.audio import AudioRingBuffer, VoiceActivityDetector, resample_pcm
+from src.transcription import AsyncTranscriptionPipeline, BaseTranscriber, build_transcriber
+from src.tts import EdgeSynthesizer, PlaybackSession, parse_sentence
+from src.tracing import Tracer
+from src.connections import close_aio_session, warm_up, warm_up_async
+
+load_dotenv()
+openai.api_key = os.getenv("OPENAI_API_KEY")
+if not openai.api_key:
+    raise Exception("OPENAI_API_KEY not set in .env file.")
+
+DEFAULT_SAMPLE_RATE = 16000  # client capture rate unless ?sample_rate= says otherwise
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+RING_SECONDS = 30
+VAD_PAUSE_MS = 500
+END_OF_TURN_MS = 1500
+TRANSCRIBE_RATE = 16000
+MAX_IN_FLIGHT_CHUNKS = 4  # per session
+
+# Shared across every session in the process.
+STT_BACKEND = os.getenv("SOPHIE_STT_BACKEND", "openai")
+SERVER_TTS = os.getenv("SOPHIE_SERVER_TTS", "edge")  # "edge", or "none" for text only
+STT_CONCURRENCY = int(os.getenv("SOPHIE_STT_CONCURRENCY", 16))
+LLM_CONCURRENCY = int(os.getenv("SOPHIE_LLM_CONCURRENCY", 32))
+TTS_CONCURRENCY = int(os.getenv("SOPHIE_TTS_CONCURRENCY", 16))
+WORKER_THREADS = int(os.getenv("SOPHIE_WORKER_THREADS", (os.cpu_count() or 1) * 4))
+WARM_UP = os.getenv("SOPHIE_WARM_UP", "1") == "1"  # off for benchmarks
+
+tracer = Tracer(os.getenv("SOPHIE_TRACE_FILE", "latency_traces.jsonl") or None)
+
+
+class PooledTranscriber(BaseTranscriber):
+    """
+    One transcription backend shared by all sessions, with at most ``slots``
+    requests in flight across the process.
+    """
+
+    def __init__(self, transcriber, slots):
+        self.transcriber = transcriber
+        self.slots = asyncio.Semaphore(slots)
+
+    def transcribe(self, pcm, sample_rate):
+        return self.transcriber.transcribe(pcm, sample_rate)
+
+    async def atranscribe(self, pcm, sample_rate):
+        async with self.slots:
+            return await self.transcriber.atranscribe(pcm, sample_rate)
+
+
+class SharedServices:
+    """
+    Engines and limits shared by every session. Create on the serving loop.
+    """
+
+    def __init__(self):
+        self.transcriber = PooledTranscriber(build_transcriber(STT_BACKEND, num_workers=STT_CONCURRENCY),
+                                             STT_CONCURRENCY)
+        self.synthesizer = EdgeSynthesizer(EDGE_VOICE) if SERVER_TTS == "edge" else None
+        self.llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+        self.tts_slots = asyncio.Semaphore(TTS_CONCURRENCY)
+        self.sessions = set()
+        self.turns = 0
+        self.started_at = time.monotonic()
+
+    def stats(self):
+        cpu = time.process_time()
+        return {
+            "sessions": len(self.sessions),
+            "turns": self.turns,
+            "uptime_s": round(time.monotonic() - self.started_at, 3),
+            "cpu_s": round(cpu, 3),
+            "cpus": os.cpu_count(),
+            "turns_per_cpu_s": round(self.turns / cpu, 3) if cpu else None,
+            "latency_ms": tracer.summary(),
+        }
+
+
+class VoiceSession:
+    """
+    State of one connected client: capture, turn detection, transcript and
+    the reply being spoken. Everything runs on the serving loop; outgoing
+    messages go through one writer task so sends never interleave.
+    """
+
+    def __init__(self, ws, services, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.ws = ws
+        self.services = services
+        self.sample_rate = sample_rate
+        self.ring = AudioRingBuffer(sample_rate * RING_SECONDS)
+        self.vad = VoiceActivityDetector(sample_rate, pause_ms=VAD_PAUSE_MS, end_of_turn_ms=END_OF_TURN_MS)
+        self.outbox = asyncio.Queue()
+        self.pipeline = None  # AsyncTranscriptionPipeline of the turn being captured
+        self.trace = None
+        self.transcription = ""
+        self.playback = None  # PlaybackSession of the reply being spoken
+        self.reply_task = None
+
+    def send(self, message):
+        self.outbox.put_nowait(message)
+
+    async def writer(self):
+        while (message := await self.outbox.get()) is not None:
+            if isinstance(message, bytes):
+                await self.ws.send_bytes(message)
+            else:
+                await self.ws.send_json(message)
+
+    def start_turn(self):
+        self.trace = tracer.start_turn()
+        self.transcription = ""
+        self.vad.reset(self.ring.write_pos)
+        self.pipeline = AsyncTranscriptionPipeline(
+            self.services.transcriber, on_result=self.on_chunk_transcribed, max_in_flight=MAX_IN_FLIGHT_CHUNKS,
+        )
+
+    async def feed(self, data):
+        if len(data) % 2:
+            # Not whole int16 samples; the frame is dropped, the session goes on.
+            self.send({"type": "error", "message": "binary frames must hold whole int16 samples"})
+            return
+        if self.pipeline is None:
+            self.start_turn()
+        self.ring.write(np.frombuffer(data, dtype=np.int16).reshape(-1, 1))
+        for segment in self.vad.update(self.ring):
+            await self.transcribe_segment(segment)
+        if self.vad.in_speech and self.replying:
+            # Barge-in: the user talked over the reply.
+            self.cancel_reply()
+        if self.vad.end_of_turn:
+            self.trace.mark("end_of_speech", at=self.vad.speech_end_time())
+            await self.end_turn()
+
+    async def transcribe_segment(self, segment):
+        views = self.ring.views(segment.start, segment.end)
+        if views:
+            pcm = resample_pcm(views, self.sample_rate, TRANSCRIBE_RATE)
+            # Waits while this session already has MAX_IN_FLIGHT_CHUNKS out.
+            await self.pipeline.submit(pcm, TRANSCRIBE_RATE, tag=segment)
+
+    def on_chunk_transcribed(self, text, segment):
+        if text:
+            self.transcription += text + " "
+            self.send({"type": "transcript", "text": self.transcription.strip(), "final": False})
+
+    async def end_turn(self):
+        if self.pipeline is None:
+            return
+        self.trace.mark("end_of_speech")
+        for segment in self.vad.close(self.ring):
+            await self.transcribe_segment(segment)
+        pipeline, self.pipeline = self.pipeline, None
+        await pipeline.drain()
+        pipeline.close()
+        self.trace.mark("transcription_done")
+
+        text = self.transcription.strip()
+        self.send({"type": "transcript", "text": text, "final": True})
+        if not text:
+            self.trace.end(cancelled=True)
+            return
+        self.cancel_reply()
+        self.playback = PlaybackSession(trace=self.trace)
+        self.reply_task = asyncio.ensure_future(self.reply(text, self.playback))
+
+    @property
+    def replying(self):
+        return self.reply_task is not None and not self.reply_task.done()
+
+    def cancel_reply(self):
+        if self.playback is not None:
+            self.playback.cancel()
+
+    async def reply(self, text, session):
+        speaker = asyncio.ensure_future(self.speak(session))
+        try:
+            async with self.services.llm_slots:
+                await stream_reply(text, lambda sentence: None, session, CHAT_TIMEOUT)
+        finally:
+            session.finish()  # also when cancelled while waiting for a slot
+        await speaker
+
+    async def speak(self, session):
+        synthesizer = self.services.synthesizer
+        while (item := await session.aget()) is not None:
+            emotion, text, settings = parse_sentence(item, EMOTION_SETTINGS)
+            self.send({"type": "sentence", "emotion": emotion, "text": text})
+            if synthesizer is None:
+                continue
+            try:
+                async with self.services.tts_slots:
+                    pcm = await synthesizer.asynthesize(text, settings["rate"], settings["volume"])
+            except Exception as e:
+                print(f"TTS Error: {e}")
+                continue
+            if session.cancelled:
+                break
+            session.mark("first_audio")
+            self.send({"type": "audio", "text": text, "sample_rate": synthesizer.sample_rate, "samples": len(pcm)})
+            self.send(pcm.tobytes())
+        session.end_trace()
+        if not session.cancelled:
+            self.services.turns += 1
+        record = session.trace.to_dict()
+        self.send({"type": "turn_end", "turn": record["turn"], "cancelled": record["cancelled"],
+                   "spans_ms": record["spans_ms"]})
+
+    async def close(self):
+        self.cancel_reply()
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.reply_task is not None:
+            await asyncio.gather(self.reply_task, return_exceptions=True)
+        self.send(None)
+
+
+def parse_sample_rate(request):
+    try:
+        sample_rate = int(request.query.get("sample_rate", DEFAULT_SAMPLE_RATE))
+    except ValueError:
+        sample_rate = 0
+    if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+        # Checked before the session exists: the VAD frame size comes from it.
+        raise web.HTTPBadRequest(text=f"sample_rate must be an integer from {MIN_SAMPLE_RATE} to {MAX_SAMPLE_RATE}")
+    return sample_rate
+
+
+async def handle_session(request):
+    services = request.app["services"]
+    sample_rate = parse_sample_rate(request)
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    session = VoiceSession(ws, services, sample_rate)
+    services.sessions.add(session)
+    writer = asyncio.ensure_future(session.writer())
+    try:
+        async for msg in ws:
+            if msg.type == WSMsgType.BINARY:
+                await session.feed(msg.data)
+            elif msg.type == WSMsgType.TEXT:
+                try:
+                    command = json.loads(msg.data).get("type")
+                except (ValueError, AttributeError):
+                    # A bad frame is reported, not fatal to the session.
+                    session.send({"type": "error", "message": "expected a JSON object with a \"type\""})
+                    continue
+                if command == "end":
+                    await session.end_turn()
+                elif command == "cancel":
+                    session.cancel_reply()
+    finally:
+        services.sessions.discard(session)
+        await session.close()
+        await asyncio.gather(writer, return_exceptions=True)  # the socket may already be gone
+    return ws
+
+
+async def handle_stats(request):
+    return web.json_response(request.app["services"].stats())
+
+
+async def on_startup(app):
+    # Blocking work from every session (local STT, MP3 decoding, resampling
+    # for the streaming decoder) shares one bounded thread pool.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(WORKER_THREADS, thread_name_prefix="worker"))
+    app["services"] = SharedServices()
+    if WARM_UP:
+        warm_up()
+        await warm_up_async()
+
+
+async def on_cleanup(app):
+    await close_aio_session()
+
+
+def create_app():
+    app = web.Application()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/ws", handle_session)
+    app.router.add_get("/stats", handle_stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Sophie to many clients over WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
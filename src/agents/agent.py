@@ -1,79 +1,393 @@
+import json
+import os
+import threading
+import time
 import openai
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait as wait_futures
 from colorama import Fore, init
+from pydantic import ValidationError
+from src.agents.memory import MEMORY_TOKEN_BUDGET, ConversationMemory
 
 # Initialize colorama for colored terminal output
 init(autoreset=True)
 
+# Tool calls from one model response run concurrently on a bounded pool; each
+# gets the tool's own `timeout`, or DEFAULT_TOOL_TIMEOUT seconds.
+MAX_PARALLEL_TOOLS = 4
+DEFAULT_TOOL_TIMEOUT = 30
+
+# Bounds on one user turn: LLM round trips, and wall-clock seconds for the
+# whole loop. The last step is asked to answer without calling more tools;
+# the last FINAL_ANSWER_RESERVE seconds are kept for that answer.
+MAX_AGENT_STEPS = int(os.getenv("SOPHIE_AGENT_MAX_STEPS", 6))
+AGENT_DEADLINE = float(os.getenv("SOPHIE_AGENT_DEADLINE", 60))
+FINAL_ANSWER_RESERVE = float(os.getenv("SOPHIE_AGENT_FINAL_RESERVE", 8))
+# Said when a turn runs out before the model could answer.
+CUT_SHORT_REPLY = "Sorry, I ran out of time before I could finish that. Please try again."
+# How often a stopped turn checks whether it can stop waiting on a tool.
+STOP_POLL = 0.1
+
+_schemas = {}  # tool class -> FrozenSchema, shared by every Agent
+_schemas_lock = threading.Lock()
+
+class FrozenSchema(dict):
+    """
+    Read-only dict for schemas shared between agents. json.dumps still
+    serializes it as a plain object.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("tool schemas are shared and read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenSchema((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def tool_schema(tool):
+    """
+    The chat API `tools` entry for a tool class. instructor rebuilds
+    openai_schema from the model and docstring on every access, so it is
+    built once per class and reused.
+    """
+    with _schemas_lock:
+        schema = _schemas.get(tool)
+        if schema is None:
+            schema = _schemas[tool] = freeze({"type": "function", "function": tool.openai_schema})
+        return schema
+
+def arguments_complete(arguments):
+    # Streamed arguments are a JSON object, which only parses once it is whole.
+    try:
+        return isinstance(json.loads(arguments), dict)
+    except ValueError:
+        return False
+
+def call_key(tool_call):
+    # Identical calls match even if the model orders or spaces the arguments differently.
+    arguments = tool_call.get("arguments") or "{}"
+    try:
+        arguments = json.dumps(json.loads(arguments), sort_keys=True)
+    except ValueError:
+        pass
+    return tool_call.get("name"), arguments
+
+class AgentRun:
+    """
+    Budget and timings of one user turn: at most ``max_steps`` LLM round
+    trips within ``deadline`` seconds, of which up to ``reserve`` are kept
+    for a final answer without tools. Tool results are kept per call, so a
+    call the model repeats is answered from the first result instead of
+    running again. Setting ``stop`` (a threading.Event) ends the turn after
+    the current step.
+    """
+
+    def __init__(self, max_steps=MAX_AGENT_STEPS, deadline=AGENT_DEADLINE, stop=None, reserve=FINAL_ANSWER_RESERVE):
+        self.max_steps = max_steps
+        self.stop = stop
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline
+        # Tools and tool-calling steps have to be done by then.
+        self.answer_by = self.deadline - min(reserve, deadline / 2)
+        self.steps = []  # {"llm_ms", "tools_ms", "tool_calls", "repeated"} per step
+        self.results = {}  # call_key -> (Future, submitted at)
+        self.stalled = False  # the last step only repeated earlier calls
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def stopped(self):
+        return self.stop is not None and self.stop.is_set()
+
+    @property
+    def exhausted(self):
+        return len(self.steps) >= self.max_steps or self.remaining() <= 0
+
+    @property
+    def final_step(self):
+        # Answer now: this is the last step allowed, time is running out, or
+        # the model is going in circles.
+        return len(self.steps) >= self.max_steps or time.monotonic() >= self.answer_by or self.stalled
+
+    def start_step(self):
+        self.steps.append({"llm_ms": 0.0, "tools_ms": 0.0, "tool_calls": 0, "repeated": 0})
+        return time.monotonic()
+
+    def end_llm(self, started):
+        self.steps[-1]["llm_ms"] = (time.monotonic() - started) * 1000
+
+    def end_tools(self, started, tool_calls, repeated):
+        step = self.steps[-1]
+        step["tools_ms"] = (time.monotonic() - started) * 1000
+        step["tool_calls"] = len(tool_calls)
+        step["repeated"] = repeated
+        self.stalled = repeated == len(tool_calls)
+
+    def report(self, name):
+        total = (time.monotonic() - self.started) * 1000
+        steps = ", ".join(f"llm {step['llm_ms']:.0f} ms" + (f" + {step['tool_calls']} tools {step['tools_ms']:.0f} ms"
+                                                            if step["tool_calls"] else "")
+                          for step in self.steps)
+        print(Fore.YELLOW + f"\nAgent {name}: {len(self.steps)} steps in {total:.0f} ms ({steps})")
+
 class Agent:
-    def __init__(self, name, model, tools=None, system_prompt=""):
+    def __init__(self, name, model, tools=None, system_prompt="", max_parallel_tools=MAX_PARALLEL_TOOLS,
+                 tool_timeout=DEFAULT_TOOL_TIMEOUT, memory_tokens=MEMORY_TOKEN_BUDGET, max_steps=MAX_AGENT_STEPS,
+                 deadline=AGENT_DEADLINE):
         self.name = name
         self.model = model  # e.g. "gpt-4"
-        self.messages = []
+        # History sent on every call, kept under memory_tokens
+        self.memory = ConversationMemory(budget=memory_tokens)
         self.tools = tools if tools is not None else []
         self.tools_schemas = self.get_openai_tools_schema() if self.tools else None
+        # Tool class by the name the model calls it
+        self.dispatch = {schema["function"]["name"]: tool for tool, schema in zip(self.tools, self.tools_schemas or ())}
+        self.tool_timeout = tool_timeout
+        self.tool_executor = ThreadPoolExecutor(max_workers=max_parallel_tools, thread_name_prefix="tool")
+        self.max_steps = max_steps
+        self.deadline = deadline
+        self.last_run = None  # AgentRun of the latest turn
+        # One turn at a time: a turn appends to the history from start to end,
+        # so the next one waits until it is over.
+        self.turn_lock = threading.Lock()
         self.system_prompt = system_prompt
-        if self.system_prompt and not self.messages:
+        if self.system_prompt:
             self.handle_messages_history("system", self.system_prompt)
 
+    @property
+    def messages(self):
+        return self.memory.messages
+
     def invoke(self, message):
         print(Fore.GREEN + f"\nCalling Agent: {self.name}")
-        self.handle_messages_history("user", message)
-        result = self.execute()
+        with self.turn_lock:
+            self.handle_messages_history("user", message)
+            result = self.execute()
         return result
 
+    def invoke_stream(self, message, stop=None):
+        """
+        Like invoke, but yields the reply text as it streams. Tool calls are
+        assembled from the stream and each read-only one starts running as
+        soon as its arguments are complete, while the rest of the response
+        streams in. Tools that change data wait for the whole response, so a
+        reply cut off mid-stream never leaves one running unrecorded.
+        Set ``stop`` when the reply is no longer wanted: the turn stops after
+        the current step, so the next turn does not wait long for it.
+        """
+        print(Fore.GREEN + f"\nCalling Agent: {self.name}")
+        with self.turn_lock:
+            self.handle_messages_history("user", message)
+            run = self.last_run = AgentRun(self.max_steps, self.deadline, stop)
+            try:
+                while not run.exhausted and not run.stopped:
+                    started = run.start_step()
+                    tool_calls, submitted = yield from self.stream_step(run)
+                    run.end_llm(started)
+                    if not tool_calls:
+                        return
+                    self.run_tools(tool_calls, submitted, run)
+                if not run.stopped:
+                    yield self.cut_short()
+            finally:
+                run.report(self.name)
+
+    def stream_step(self, run):
+        # One streamed completion: yields its text, returns its tool calls
+        # (already submitted) once the stream ends.
+        content, tool_calls, submitted = [], [], []
+        response = openai.ChatCompletion.create(stream=True, request_timeout=run.remaining(),
+                                                **self.chat_params(final=run.final_step))
+        try:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if text := delta.get("content"):
+                    content.append(text)
+                    yield text
+                for call_delta in delta.get("tool_calls") or []:
+                    index = call_delta.get("index", 0)
+                    if index >= len(tool_calls):
+                        # Calls stream one after another, so the earlier ones are complete.
+                        self.submit_tools(tool_calls, submitted, index, run, read_only=True)
+                        tool_calls.append({"name": "", "arguments": "", "id": "", "type": "function"})
+                    self.merge_call_delta(tool_calls[index], call_delta)
+                    if index == len(submitted) and arguments_complete(tool_calls[index]["arguments"]):
+                        self.submit_tools(tool_calls, submitted, index + 1, run, read_only=True)
+                if function_call := delta.get("function_call"):
+                    # Legacy single function call
+                    if not tool_calls:
+                        tool_calls.append({"name": "", "arguments": "", "id": "", "type": "function"})
+                    self.merge_call_delta(tool_calls[0], {"function": function_call})
+        finally:
+            if hasattr(response, "close"):
+                response.close()  # also when the caller stops reading early
+        if run.stopped:
+            # Only read-only calls have started; the rest are dropped unrun.
+            del tool_calls[len(submitted):]
+        self.submit_tools(tool_calls, submitted, len(tool_calls), run)
+        self.handle_messages_history("assistant", "".join(content), tool_calls=tool_calls)
+        return tool_calls, submitted
+
+    def merge_call_delta(self, tool_call, call_delta):
+        if call_delta.get("id"):
+            tool_call["id"] = call_delta["id"]
+        function = call_delta.get("function") or {}
+        tool_call["name"] += function.get("name") or ""
+        tool_call["arguments"] += function.get("arguments") or ""
+
     def execute(self):
-        response_message = self.call_llm()
-        response_content = response_message.get("content", "")
-        tool_calls = response_message.get("tool_calls", [])
-        if tool_calls:
+        # LLM, tools, LLM, ... until the model answers or the turn's budget
+        # runs out. The loop replaces recursion between execute and run_tools.
+        run = self.last_run = AgentRun(self.max_steps, self.deadline)
+        response_content = ""
+        try:
+            while not run.exhausted:
+                started = run.start_step()
+                response_message = self.call_llm(run)
+                run.end_llm(started)
+                response_content = response_message.get("content") or ""
+                tool_calls = response_message.get("tool_calls", [])
+                if not tool_calls:
+                    return response_content
+                try:
+                    submitted = []
+                    self.submit_tools(tool_calls, submitted, len(tool_calls), run)
+                    self.run_tools(tool_calls, submitted, run)
+                except Exception as e:
+                    print(Fore.RED + f"\nError: {e}\n")
+                    return response_content
+            return self.cut_short()
+        finally:
+            run.report(self.name)
+
+    def cut_short(self):
+        # The loop ended on tool results: close the turn with a reply, so the
+        # history does not end on tool messages and the user hears something.
+        print(Fore.RED + f"\nAgent {self.name}: out of steps or time, reply cut short")
+        self.handle_messages_history("assistant", CUT_SHORT_REPLY)
+        return CUT_SHORT_REPLY
+
+    def run_tools(self, tool_calls, submitted, run):
+        # Independent calls run at the same time, so a step costs the slowest
+        # tool rather than the sum. Results are recorded in call order.
+        started = time.monotonic()
+        repeated = self.record_tool_results(tool_calls, submitted, run)
+        run.end_tools(started, tool_calls, repeated)
+
+    def submit_tools(self, tool_calls, submitted, complete, run, read_only=False):
+        # Start every call before index `complete` that is not running yet,
+        # in order. A call already made this turn reuses its result instead.
+        # With read_only, stop at the first call to a tool that changes data.
+        for tool_call in tool_calls[len(submitted):complete]:
+            if read_only and self.changes_data(tool_call.get("name")):
+                break
+            key = call_key(tool_call)
+            repeated = key in run.results
+            if not repeated:
+                run.results[key] = (self.tool_executor.submit(self.execute_tool, tool_call), time.monotonic())
+            future, started = run.results[key]
+            submitted.append((future, started, repeated))
+
+    def record_tool_results(self, tool_calls, submitted, run):
+        repeated_calls = 0
+        for tool_call, (future, started, repeated) in zip(tool_calls, submitted):
+            function_name = tool_call.get("name")
+            timeout = self.get_tool_timeout(function_name)
+            finished = self.wait_for_tool(future, function_name, min(started + timeout, run.answer_by), run)
             try:
-                response_content = self.run_tools(tool_calls)
-            except Exception as e:
-                print(Fore.RED + f"\nError: {e}\n")
-        return response_content
-
-    def run_tools(self, tool_calls):
-        for tool_call in tool_calls:
-            self.execute_tool(tool_call)
-        # After running a tool, re-call the LLM to incorporate the tool’s output.
-        response_content = self.execute()
-        return response_content
+                if not finished:
+                    # The thread cannot be interrupted; stop waiting and tell the model.
+                    future.cancel()
+                    raise CancelledError
+                output = future.result()
+            except CancelledError:
+                # Every call still gets a tool message, and a repeat of it
+                # runs the tool again instead of reusing this future.
+                if run.results.get(call_key(tool_call), (None,))[0] is future:
+                    del run.results[call_key(tool_call)]
+                if finished or run.stopped:
+                    output = f"Error: {function_name} was cancelled"
+                else:
+                    print(Fore.RED + f"\nTool {function_name} timed out")
+                    output = f"Error: {function_name} did not finish in time"
+            if repeated:
+                repeated_calls += 1
+                output += "\n(Repeated call: this is the result from earlier in this turn.)"
+            tool_message = {"name": function_name, "tool_call_id": tool_call.get("id")}
+            self.handle_messages_history("tool", output, tool_output=tool_message)
+        return repeated_calls
+
+    def wait_for_tool(self, future, function_name, wait_until, run):
+        # True once the tool has finished. A stopped turn still waits for tools
+        # that change data, so the history says whether they ran; read-only
+        # ones are left behind.
+        while not future.done():
+            left = wait_until - time.monotonic()
+            if left <= 0 or (run.stopped and not self.changes_data(function_name)):
+                return False
+            wait_futures([future], timeout=min(left, STOP_POLL))
+        return True
+
+    def changes_data(self, function_name):
+        return getattr(self.dispatch.get(function_name), "changes_data", False)
+
+    def get_tool_timeout(self, function_name):
+        func = self.dispatch.get(function_name)
+        timeout = getattr(func, "timeout", None)
+        return timeout if timeout is not None else self.tool_timeout
 
     def execute_tool(self, tool_call):
         function_name = tool_call.get("name")
-        # Find the tool function by name
-        func = next((func for func in self.tools if func.__name__ == function_name), None)
+        func = self.dispatch.get(function_name)
         if not func:
-            return f"Error: Function {function_name} not found. Available functions: {[func.__name__ for func in self.tools]}"
+            return f"Error: Function {function_name} not found. Available functions: {list(self.dispatch)}"
         try:
-            print(Fore.GREEN + f"\nCalling Tool: {function_name}")
-            print(Fore.GREEN + f"Arguments: {tool_call.get('arguments')}\n")
-            # Evaluate the arguments string into a dict (ensure safe usage in your context)
-            func_args = eval(tool_call.get("arguments", "{}"))
-            output = func(**func_args).run()
-            tool_message = {"name": function_name, "tool_call_id": tool_call.get("id")}
-            self.handle_messages_history("tool", output, tool_output=tool_message)
-            return output
+            # One print per call so concurrent calls do not interleave
+            print(Fore.GREEN + f"\nCalling Tool: {function_name}\nArguments: {tool_call.get('arguments')}\n")
+            # Parsed as JSON and checked against the tool's fields; the model's
+            # output is never evaluated as code.
+            tool = func.model_validate_json(tool_call.get("arguments") or "{}")
+        except ValidationError as e:
+            # Short enough for the model to correct its call
+            problems = "; ".join(f"{'.'.join(map(str, error['loc'])) or 'arguments'}: {error['msg']}" for error in e.errors())
+            print("Error: ", problems)
+            return f"Error: invalid arguments for {function_name}: {problems}"
+        try:
+            return str(tool.run_cached())
         except Exception as e:
             print("Error: ", str(e))
             return "Error: " + str(e)
 
-    def call_llm(self):
-        # Prepare function definitions if any tools are available (for OpenAI function calling)
-        functions = None
-        if self.tools and self.tools_schemas:
-            functions = [tool_schema for tool_schema in self.tools_schemas]
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=self.messages,
-            temperature=0.1,
-            functions=functions,
-        )
+    def call_llm(self, run):
+        response = openai.ChatCompletion.create(request_timeout=run.remaining(), **self.chat_params(final=run.final_step))
         message = response.choices[0].message
 
-        # Process function calls if present
-        if "function_call" in message and message["function_call"]:
-            # Wrap the function call into a list for compatibility
+        # Process tool calls if present
+        if message.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "name": call["function"]["name"],
+                    "arguments": call["function"].get("arguments", "{}"),
+                    "id": call.get("id", ""),
+                    "type": call.get("type", "function"),
+                }
+                for call in message["tool_calls"]
+            ]
+        elif "function_call" in message and message["function_call"]:
+            # Legacy single function call; wrap it into a list for compatibility
             message["tool_calls"] = [message["function_call"]]
         else:
             message["tool_calls"] = []
@@ -81,15 +395,21 @@ class Agent:
         self.handle_messages_history("assistant", message.get("content", ""), tool_calls=message.get("tool_calls", []))
         return message
 
+    def chat_params(self, final=False):
+        params = dict(model=self.model, messages=self.messages, temperature=0.1)
+        # Offer the tools in the `tools` format, which lets the model ask for
+        # several calls in one response.
+        if self.tools and self.tools_schemas:
+            params["tools"] = self.tools_schemas
+            if final:
+                params["tool_choice"] = "none"  # answer with what the tools returned so far
+        return params
+
     def get_openai_tools_schema(self):
-        return [
-            {"type": "function", "function": tool.openai_schema} for tool in self.tools
-        ]
+        return tuple(tool_schema(tool) for tool in self.tools)
 
     def reset(self):
-        self.messages = []
-        if self.system_prompt:
-            self.handle_messages_history("system", self.system_prompt)
+        self.memory.reset({"role": "system", "content": self.system_prompt} if self.system_prompt else None)
 
     def handle_messages_history(self, role, content, tool_calls=None, tool_output=None):
         message = {"role": role, "content": content}
@@ -98,16 +418,19 @@ class Agent:
         if tool_output:
             message["name"] = tool_output["name"]
             message["tool_call_id"] = tool_output["tool_call_id"]
-        self.messages.append(message)
+        self.memory.append(message)
 
     def parse_tool_calls(self, calls):
+        # Assistant tool calls as the chat API expects them in the history.
         parsed_calls = []
         for call in calls:
             parsed_call = {
-                "name": call.get("name", ""),
-                "arguments": call.get("arguments", "{}"),
                 "id": call.get("id", ""),
-                "type": call.get("type", ""),
+                "type": "function",
+                "function": {
+                    "name": call.get("name", ""),
+                    "arguments": call.get("arguments", "{}"),
+                },
             }
             parsed_calls.append(parsed_call)
         return parsed_calls
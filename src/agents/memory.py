@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import openai
+from src.prompts.prompts import SUMMARY_PROMPT_TEMPLATE
+
+# Prompt budget for the history sent on every call, system prompt included.
+MEMORY_TOKEN_BUDGET = int(os.getenv("SOPHIE_MEMORY_TOKENS", 6000))
+TOOL_OUTPUT_TOKENS = 800  # a tool result in the current turn
+COMPACT_TOOL_OUTPUT_TOKENS = 120  # a tool result once its turn is over
+SUMMARY_TOKENS = 300
+SUMMARY_MODEL = os.getenv("SOPHIE_SUMMARY_MODEL", "gpt-4o-mini")
+MESSAGE_OVERHEAD = 4  # tokens the chat format adds per message
+CHARS_PER_TOKEN = 4  # estimate when tiktoken is not installed
+
+_encoder = None
+
+
+def count_tokens(text):
+    """
+    Tokens in ``text``, exact with tiktoken installed, estimated otherwise.
+    """
+    global _encoder
+    if not text:
+        return 0
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_tokens(message):
+    tokens = MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"]))
+    return tokens
+
+
+def truncate(text, max_tokens):
+    """
+    Keep the head and tail of a long text, marking what was cut.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    return f"{text[:head]}\n[... {len(text) - max_chars} characters omitted ...]\n{text[-tail:]}"
+
+
+def summary_message(summary):
+    return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+
+class ConversationMemory:
+    """
+    Chat history kept under a token budget.
+
+    The system prompt is pinned. Messages are grouped into turns, each
+    starting at a user message, and token counts are kept per turn as
+    messages arrive instead of recounting the history on every call. When
+    the total goes over ``budget`` the oldest whole turns are evicted (so a
+    tool call is never separated from its result) and folded into a running
+    summary by a background thread; the summary is sent right after the
+    system prompt. Tool results are truncated, and compacted further once
+    their turn is over.
+    """
+
+    def __init__(self, budget=MEMORY_TOKEN_BUDGET, tool_output_tokens=TOOL_OUTPUT_TOKENS,
+                 compact_tool_output_tokens=COMPACT_TOOL_OUTPUT_TOKENS, summarize=True, model=SUMMARY_MODEL):
+        self.budget = budget
+        self.tool_output_tokens = tool_output_tokens
+        self.compact_tool_output_tokens = compact_tool_output_tokens
+        self.summarize = summarize
+        self.model = model
+        self.system = None
+        self.summary = ""
+        self.turns = []  # [messages, tokens] per turn, oldest first
+        self.tokens = 0  # system prompt, summary and every turn
+        self._summary_tokens = 0
+        self._generation = 0  # bumped by reset() to drop summaries in flight
+        self._lock = threading.Lock()
+        self._summarizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+    @property
+    def messages(self):
+        with self._lock:
+            messages = [self.system] if self.system else []
+            if self.summary:
+                messages.append(summary_message(self.summary))
+            for turn, _ in self.turns:
+                messages.extend(turn)
+            return messages
+
+    def append(self, message):
+        with self._lock:
+            if message["role"] == "system" and not self.turns:
+                if self.system:
+                    self.tokens -= message_tokens(self.system)
+                self.system = message
+                self.tokens += message_tokens(message)
+                return
+            if message["role"] == "tool":
+                message["content"] = truncate(str(message["content"]), self.tool_output_tokens)
+            if message["role"] == "user" or not self.turns:
+                if self.turns:
+                    self._compact(self.turns[-1])
+                self.turns.append([[], 0])
+            tokens = message_tokens(message)
+            self.turns[-1][0].append(message)
+            self.turns[-1][1] += tokens
+            self.tokens += tokens
+            self._evict()
+
+    def reset(self, system=None):
+        with self._lock:
+            self._generation += 1
+            self.system = system
+            self.summary = ""
+            self.turns = []
+            self._summary_tokens = 0
+            self.tokens = message_tokens(system) if system else 0
+
+    def _compact(self, turn):
+        for message in turn[0]:
+            if message["role"] == "tool":
+                before = message_tokens(message)
+                message["content"] = truncate(message["content"], self.compact_tool_output_tokens)
+                saved = before - message_tokens(message)
+                turn[1] -= saved
+                self.tokens -= saved
+
+    def _evict(self):
+        # The turn in progress always stays, even if it alone is over budget.
+        evicted = []
+        while self.tokens > self.budget and len(self.turns) > 1:
+            turn, tokens = self.turns.pop(0)
+            self.tokens -= tokens
+            evicted.extend(turn)
+        if evicted and self.summarize:
+            self._summarizer.submit(self._fold, evicted, self._generation)
+
+    def _fold(self, evicted, generation):
+        lines = []
+        for message in evicted:
+            if message.get("content"):
+                lines.append(f"{message['role']}: {message['content']}")
+            for call in message.get("tool_calls", []):
+                lines.append(f"assistant called {call['function']['name']}({call['function']['arguments']})")
+        prompt = SUMMARY_PROMPT_TEMPLATE.format(max_words=SUMMARY_TOKENS * 3 // 4, summary=self.summary or "(none)",
+                                                messages="\n".join(lines))
+        try:
+            response = openai.ChatCompletion.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                max_tokens=SUMMARY_TOKENS,
+            )
+        except Exception as e:
+            # The evicted turns are simply forgotten.
+            print(f"Memory summary failed: {e}")
+            return
+        summary = response.choices[0].message.get("content", "").strip()
+        with self._lock:
+            if generation != self._generation:
+                return
+            tokens = message_tokens(summary_message(summary))
+            self.tokens += tokens - self._summary_tokens
+            self.summary, self._summary_tokens = summary, tokens
+            self._evict()
@@ -0,0 +1,6 @@
+from .ring_buffer import AudioRingBuffer
+from .encoding import encode_audio, encode_flac, encode_wav
+from .resample import resample_pcm
+from .vad import SpeechSegment, VoiceActivityDetector
+
+__all__ = ['AudioRingBuffer', 'encode_audio', 'encode_flac', 'encode_wav', 'resample_pcm', 'SpeechSegment', 'VoiceActivityDetector']
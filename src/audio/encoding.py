@@ -0,0 +1,62 @@
+import io
+import wave
+import numpy as np
+
+
+def encode_wav(pcm, sample_rate, name="audio.wav"):
+    """
+    Encode int16 PCM samples into an in-memory WAV container.
+
+    ``pcm`` may be an ndarray of shape (frames,) or (frames, channels), or a
+    list of such arrays / memoryviews (e.g. the windows returned by
+    ``AudioRingBuffer.views``), which are written one after another without
+    being concatenated first. The returned BytesIO is rewound and carries a
+    ``name`` so HTTP clients can infer the upload format from it.
+    """
+    parts = pcm if isinstance(pcm, (list, tuple)) else [pcm]
+    parts = [np.asarray(part) for part in parts]
+    channels = parts[0].shape[1] if parts and parts[0].ndim > 1 else 1
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)  # 16-bit PCM = 2 bytes per sample.
+        wf.setframerate(sample_rate)
+        for part in parts:
+            wf.writeframes(np.ascontiguousarray(part, dtype=np.int16).tobytes())
+    buf.seek(0)
+    buf.name = name
+    return buf
+
+
+def encode_flac(pcm, sample_rate, name="audio.flac"):
+    """
+    Encode int16 PCM into an in-memory FLAC container. Lossless, and roughly
+    half the size of WAV for speech. Needs the optional ``soundfile`` package.
+    """
+    try:
+        import soundfile as sf
+    except ImportError as e:
+        raise ImportError("FLAC uploads need the 'soundfile' package: pip install soundfile") from e
+
+    parts = pcm if isinstance(pcm, (list, tuple)) else [pcm]
+    data = np.concatenate([np.asarray(part) for part in parts], axis=0)
+    buf = io.BytesIO()
+    sf.write(buf, np.ascontiguousarray(data, dtype=np.int16), sample_rate, format="FLAC", subtype="PCM_16")
+    buf.seek(0)
+    buf.name = name
+    return buf
+
+
+ENCODERS = {"wav": encode_wav, "flac": encode_flac}
+
+
+def encode_audio(pcm, sample_rate, audio_format="wav"):
+    """
+    Encode PCM with the named container format ("wav" or "flac").
+    """
+    try:
+        encoder = ENCODERS[audio_format]
+    except KeyError:
+        raise ValueError(f"Unsupported audio format: {audio_format}. Available: {list(ENCODERS)}")
+    return encoder(pcm, sample_rate)
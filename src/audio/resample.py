@@ -0,0 +1,42 @@
+from functools import lru_cache
+from math import gcd
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+
+@lru_cache(maxsize=8)
+def anti_alias_filter(up, down, taps_per_phase=10):
+    """
+    Kaiser-windowed low-pass FIR for a polyphase ``up/down`` resampler, cut off
+    just below the Nyquist frequency of the slower rate. Designed once per
+    rate pair and reused for every chunk.
+    """
+    max_rate = max(up, down)
+    num_taps = 2 * taps_per_phase * max_rate + 1
+    taps = firwin(num_taps, 0.95 / max_rate, window=("kaiser", 5.0))
+    taps.setflags(write=False)
+    return taps
+
+
+def resample_pcm(pcm, src_rate, dst_rate=16000):
+    """
+    Convert int16 capture to mono int16 at ``dst_rate``.
+
+    ``pcm`` may be an ndarray of shape (frames,) or (frames, channels), or a
+    list of such windows as returned by ``AudioRingBuffer.views``. The result
+    is always a new array, so it stays valid after the ring moves on.
+    """
+    parts = pcm if isinstance(pcm, (list, tuple)) else [pcm]
+    parts = [np.asarray(part) for part in parts]
+    if not parts:
+        return np.empty(0, dtype=np.int16)
+    data = np.concatenate(parts, axis=0) if len(parts) > 1 else parts[0]
+    if data.ndim > 1:
+        data = data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+
+    divisor = gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // divisor, int(src_rate) // divisor
+    if up == down:
+        return np.array(data, dtype=np.int16)
+    out = resample_poly(data.astype(np.float32), up, down, window=anti_alias_filter(up, down))
+    return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
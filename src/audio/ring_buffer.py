@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size ring buffer for captured audio.
+
+    Positions are absolute sample indices that only ever grow, so a reader can
+    hold on to a cursor for the whole recording while memory stays bounded by
+    ``capacity``. There is a single writer (the sounddevice callback) which
+    copies each block into preallocated storage exactly once; readers take
+    zero-copy memoryview windows and never block the writer.
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros((self.capacity, channels), dtype=self.dtype)
+        self._write_pos = 0
+
+    @property
+    def write_pos(self):
+        """
+        Absolute index one past the newest sample written
+        """
+        return self._write_pos
+
+    @property
+    def oldest_pos(self):
+        """
+        Absolute index of the oldest sample still held in the buffer
+        """
+        return max(0, self._write_pos - self.capacity)
+
+    def reset(self):
+        """
+        Forget all captured audio. Only call while the writer is stopped.
+        """
+        self._write_pos = 0
+
+    def write(self, block):
+        """
+        Copy a (frames, channels) block into the ring and publish it.
+        """
+        frames = len(block)
+        if frames > self.capacity:
+            # Only the tail can ever be read back, skip the rest.
+            block = block[-self.capacity:]
+        start = (self._write_pos + frames - len(block)) % self.capacity
+        first = min(len(block), self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        if first < len(block):
+            self._data[:len(block) - first] = block[first:]
+        # Advance the cursor only after the samples are in place so readers
+        # never observe a half-written block.
+        self._write_pos += frames
+
+    def clamp(self, start, end=None):
+        """
+        Clamp an absolute [start, end) range to what is currently readable.
+        """
+        write_pos = self._write_pos
+        end = write_pos if end is None else min(end, write_pos)
+        start = max(start, write_pos - self.capacity, 0)
+        return start, max(start, end)
+
+    def views(self, start, end=None):
+        """
+        Return the samples in [start, end) as at most two memoryviews, without
+        copying. Ranges that have already been overwritten are clamped away.
+        """
+        start, end = self.clamp(start, end)
+        if start == end:
+            return []
+        lo = start % self.capacity
+        hi = lo + (end - start)
+        if hi <= self.capacity:
+            return [memoryview(self._data[lo:hi])]
+        return [memoryview(self._data[lo:]), memoryview(self._data[:hi - self.capacity])]
+
+    def read(self, start, end=None):
+        """
+        Return the samples in [start, end) as an ndarray. This is a view when
+        the range is contiguous in the ring and a single copy when it wraps.
+        """
+        parts = [np.asarray(view) for view in self.views(start, end)]
+        if not parts:
+            return np.empty((0, self.channels), dtype=self.dtype)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts, axis=0)
+
+    def overrun(self, start):
+        """
+        True if samples from ``start`` onwards have since been overwritten,
+        i.e. a window taken from there can no longer be trusted.
+        """
+        return start < self._write_pos - self.capacity
@@ -0,0 +1,178 @@
+import time
+from typing import NamedTuple
+import numpy as np
+
+
+class SpeechSegment(NamedTuple):
+    """
+    Absolute [start, end) sample range of one utterance in the capture ring
+    """
+    start: int
+    end: int
+
+
+class VoiceActivityDetector:
+    """
+    Energy / zero-crossing voice activity detector for int16 capture.
+
+    Features are computed for all pending frames at once with NumPy; only the
+    per-frame speech/silence decisions go through the small state machine
+    that turns them into utterance segments at natural pauses. After
+    ``end_of_turn_ms`` of trailing silence following speech, ``end_of_turn``
+    becomes True so the caller can close the turn automatically.
+    """
+
+    def __init__(self, sample_rate, frame_ms=30, energy_threshold=400.0, noise_ratio=3.0,
+                 zcr_threshold=0.25, pause_ms=500, end_of_turn_ms=1500,
+                 min_speech_ms=200, max_segment_ms=15000, pad_ms=150):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold = energy_threshold  # minimum RMS that counts as voiced
+        self.noise_ratio = noise_ratio  # voiced frames must be this far above the noise floor
+        self.zcr_threshold = zcr_threshold  # zero-crossing rate of unvoiced sounds ("s", "f")
+        self.pause = self._samples(pause_ms)
+        self.end_of_turn_silence = self._samples(end_of_turn_ms)
+        self.min_speech = self._samples(min_speech_ms)
+        self.max_segment = self._samples(max_segment_ms)
+        self.pad = self._samples(pad_ms)
+        self.reset()
+
+    def _samples(self, ms):
+        return int(self.sample_rate * ms / 1000)
+
+    def reset(self, position=0):
+        """
+        Start a new turn, analysing capture from absolute ``position``.
+        """
+        self.position = position  # next absolute sample to analyse
+        self.noise_floor = None
+        self.heard_speech = False
+        self._speech_start = None
+        self._last_speech_end = position
+        self._emitted_until = position
+
+    @property
+    def in_speech(self):
+        return self._speech_start is not None
+
+    @property
+    def speech_start(self):
+        """
+        Absolute start of the utterance in progress, or None between utterances
+        """
+        return self._speech_start
+
+    @property
+    def trailing_silence(self):
+        """
+        Samples analysed since speech was last heard
+        """
+        return self.position - self._last_speech_end
+
+    def speech_end_time(self):
+        """
+        time.monotonic() at which speech really ended: when the trailing
+        silence began, not when it was noticed
+        """
+        return time.monotonic() - self.trailing_silence / self.sample_rate
+
+    @property
+    def end_of_turn(self):
+        """
+        True once speech was heard and has been followed by enough silence
+        """
+        return (self.heard_speech and not self.in_speech
+                and self.position - self._last_speech_end >= self.end_of_turn_silence)
+
+    def classify(self, frames):
+        """
+        Vectorized speech/silence decision for a (n_frames, frame) int16 array.
+        """
+        x = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+
+        floor = self.noise_floor if self.noise_floor is not None else float(np.min(rms))
+        threshold = max(self.energy_threshold, floor * self.noise_ratio)
+        voiced = rms >= threshold
+        # Fricatives are quieter but much noisier than voiced speech.
+        unvoiced = (rms >= threshold * 0.5) & (zcr >= self.zcr_threshold)
+        speech = voiced | unvoiced
+
+        silent = rms[~speech]
+        if len(silent):
+            level = float(np.mean(silent))
+            self.noise_floor = level if self.noise_floor is None else 0.9 * self.noise_floor + 0.1 * level
+        return speech
+
+    def update(self, ring):
+        """
+        Analyse every whole frame captured since the last call and return the
+        list of utterance segments that were closed by a pause.
+        """
+        self.position = max(self.position, ring.oldest_pos)
+        available = (ring.write_pos - self.position) // self.frame
+        if available <= 0:
+            return []
+        end = self.position + available * self.frame
+        samples = ring.read(self.position, end)
+        n_frames = len(samples) // self.frame
+        if n_frames == 0:
+            return []
+        frames = samples[:n_frames * self.frame].reshape(n_frames, self.frame, -1)[:, :, 0]
+        speech = self.classify(frames)
+
+        segments = []
+        base = self.position
+        for i, is_speech in enumerate(speech):
+            frame_start = base + i * self.frame
+            frame_end = frame_start + self.frame
+            if is_speech:
+                if self._speech_start is None:
+                    self._speech_start = frame_start
+                self._last_speech_end = frame_end
+                if frame_end - self._speech_start >= self.min_speech:
+                    self.heard_speech = True
+            elif self._speech_start is not None and frame_end - self._last_speech_end >= self.pause:
+                segment = self._close(min(self._last_speech_end + self.pad, frame_end))
+                if segment:
+                    segments.append(segment)
+            if self._speech_start is not None and frame_end - self._speech_start >= self.max_segment:
+                # Never let one upload grow without bound during a monologue.
+                segments.append(self._close(frame_end, forced=True))
+                self._speech_start = frame_end
+        self.position = base + n_frames * self.frame
+        return segments
+
+    def _close(self, end, forced=False):
+        start, self._speech_start = self._speech_start, None
+        if not forced and self._last_speech_end - start < self.min_speech:
+            return None  # a click or a cough, not an utterance
+        start = max(start - self.pad, self._emitted_until)
+        self._emitted_until = end
+        return SpeechSegment(start, end)
+
+    def flush(self, end):
+        """
+        Close any utterance still open when capture stops at absolute ``end``.
+        """
+        if self._speech_start is None:
+            return None
+        start, self._speech_start = self._speech_start, None
+        start = max(start - self.pad, self._emitted_until)
+        self._emitted_until = end
+        if end <= start:
+            return None
+        return SpeechSegment(start, end)
+
+    def close(self, ring):
+        """
+        Segments still pending when capture stops: the audio not analysed yet,
+        then whatever utterance was still open.
+        """
+        segments = self.update(ring)
+        tail = self.flush(ring.write_pos)
+        if tail:
+            segments.append(tail)
+        return segments
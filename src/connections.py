@@ -0,0 +1,194 @@
+import asyncio
+import os
+import smtplib
+import threading
+import time
+import weakref
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+# Keep-alive pools for every outbound client. A TLS handshake costs a full
+# round trip or two per new connection, so connections are opened once,
+# warmed at startup and reused by every turn, thread and tool.
+POOL_CONNECTIONS = 8  # distinct hosts kept pooled
+POOL_MAXSIZE = 32  # open connections per host
+CONNECT_TIMEOUT = 5.0
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+WARM_URLS = ["https://api.tavily.com", "https://oauth2.googleapis.com"]
+
+_session = None
+_session_lock = threading.Lock()
+_aio_sessions = weakref.WeakKeyDictionary()  # event loop -> aiohttp.ClientSession
+_thread_http = threading.local()
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session shared by the whole process. openai recycles its
+    session every few minutes by closing it; closing this one is a no-op so
+    the recycle does not drop every thread's warm connections.
+    """
+
+    def close(self):
+        pass
+
+
+def http_session():
+    """
+    The process-wide pooled requests session (also used by openai).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            openai.requestssession = _session
+        return _session
+
+
+def use_aio_session():
+    """
+    Point openai's async client at the pooled aiohttp session of the running
+    loop. openai keeps the session in a context variable, so call this in
+    the task that makes the request; without it every async request opens
+    a fresh connection.
+    """
+    import aiohttp
+    loop = asyncio.get_running_loop()
+    session = _aio_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=POOL_MAXSIZE * POOL_CONNECTIONS, limit_per_host=POOL_MAXSIZE,
+                                         keepalive_timeout=120)
+        session = _aio_sessions[loop] = aiohttp.ClientSession(connector=connector)
+    openai.aiosession.set(session)
+    return session
+
+
+async def close_aio_session():
+    session = _aio_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def google_http(credentials):
+    """
+    Authorized httplib2 transport for googleapiclient over a keep-alive
+    connection owned by the calling thread (httplib2 is not thread-safe).
+    """
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    if getattr(_thread_http, "http", None) is None:
+        _thread_http.http = httplib2.Http(timeout=30)
+    return AuthorizedHttp(credentials, http=_thread_http.http)
+
+
+def google_request():
+    """
+    google.auth transport for token refreshes, on the pooled session.
+    """
+    from google.auth.transport.requests import Request
+    return Request(session=http_session())
+
+
+class SmtpConnection:
+    """
+    One logged-in SMTP_SSL connection reused across sends. It is checked
+    with NOOP after ``idle_timeout`` seconds unused and reopened if the
+    server has dropped it.
+    """
+
+    def __init__(self, host="smtp.gmail.com", port=465, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self._server = None
+        self._login = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self, user, password):
+        self._close()
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+        server.login(user, password)
+        self._server, self._login = server, (user, password)
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _alive(self, user, password):
+        if self._server is None or self._login != (user, password):
+            return False
+        if time.monotonic() - self._last_used < self.idle_timeout:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def connect(self, user, password):
+        with self._lock:
+            if not self._alive(user, password):
+                self._connect(user, password)
+            self._last_used = time.monotonic()
+
+    def sendmail(self, user, password, sender, recipient, message):
+        with self._lock:
+            if not self._alive(user, password):
+                self._connect(user, password)
+            try:
+                self._server.sendmail(sender, recipient, message)
+            except smtplib.SMTPServerDisconnected:
+                # Dropped between the check and the send; retry once.
+                self._connect(user, password)
+                self._server.sendmail(sender, recipient, message)
+            self._last_used = time.monotonic()
+
+
+smtp = SmtpConnection()
+
+
+def warm_up():
+    """
+    Open pooled connections to every API host in the background, so the
+    first turn does not pay for DNS and TLS. Failures are ignored; the
+    connection is simply made on first use instead.
+    """
+    def warm(url):
+        try:
+            http_session().head(url, timeout=CONNECT_TIMEOUT)
+        except requests.RequestException:
+            pass
+
+    def warm_smtp():
+        user, password = os.getenv("GMAIL_MAIL"), os.getenv("GMAIL_APP_PASSWORD")
+        if user and password:
+            try:
+                smtp.connect(user, password)
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    http_session()  # install it for openai before the first request
+    for url in [openai.api_base, *WARM_URLS]:
+        threading.Thread(target=warm, args=(url,), daemon=True).start()
+    threading.Thread(target=warm_smtp, daemon=True).start()
+
+
+async def warm_up_async():
+    """
+    Warm the running loop's aiohttp pool for the async openai client.
+    """
+    import aiohttp
+    session = use_aio_session()
+    try:
+        async with session.head(openai.api_base, timeout=aiohttp.ClientTimeout(total=CONNECT_TIMEOUT)):
+            pass
+    except Exception:
+        pass
@@ -0,0 +1,4 @@
+from .speculative import SpeculativeRequest, Speculator
+from .segmenter import ChunkingPolicy, SentenceSegmenter
+
+__all__ = ['SpeculativeRequest', 'Speculator', 'ChunkingPolicy', 'SentenceSegmenter']
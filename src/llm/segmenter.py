@@ -0,0 +1,233 @@
+import re
+import time
+
+EMOTION_OPEN = "[EMOTION]"
+EMOTION_TAG_PATTERN = re.compile(r'\[EMOTION\](.*?)\[/EMOTION\]')
+STRAY_TAG_PATTERN = re.compile(r'\[/?EMOTION\]')
+# An opened tag that has not closed after this many characters is not a tag;
+# its text is spoken instead of being held back.
+MAX_TAG_CHARS = 40
+
+# Words that end in a period without ending the sentence (compared lowercase,
+# without the final period).
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "approx",
+    "e.g", "i.e", "a.m", "p.m", "u.s", "u.k", "inc", "ltd",
+}
+# Abbreviations that are also ordinary words ("no", "mar"), so they only
+# count when a number follows: "No. 5", "Mar. 3".
+NUMBER_ABBREVIATIONS = {
+    "no", "fig", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+
+# Anything the scanner has to stop at: a possible tag, sentence end followed
+# by whitespace, clause punctuation followed by whitespace, or a line break.
+STOP_PATTERN = re.compile(r'\[|[.!?]+["\'”’)\]]*\s|[,;:]\s|\s[—–-]\s|\n')
+TRAILING_PUNCT = '.!?"\'”’)],;:—–-'
+
+
+class ChunkingPolicy:
+    """
+    How eagerly to cut the response for TTS.
+
+    The first chunk decides time-to-first-audio, so it may end at any clause
+    punctuation once ``first_min_chars`` are pending, or at the last space
+    after ``first_max_tokens`` streamed tokens with no boundary at all. Later
+    chunks need ``clause_min_chars`` before a clause cut, growing by
+    ``clause_growth`` per chunk up to ``max_clause_chars``, so speech settles
+    into full sentences with better prosody.
+    """
+
+    def __init__(self, first_min_chars=12, first_max_tokens=12, clause_min_chars=40,
+                 clause_growth=2.0, max_clause_chars=160, max_chunk_chars=300):
+        self.first_min_chars = first_min_chars
+        self.first_max_tokens = first_max_tokens
+        self.clause_min_chars = clause_min_chars
+        self.clause_growth = clause_growth
+        self.max_clause_chars = max_clause_chars
+        self.max_chunk_chars = max_chunk_chars  # cut at a space if no boundary comes
+
+    def clause_threshold(self, emitted):
+        """
+        Pending characters needed before a clause cut, given how many chunks
+        this turn has already emitted.
+        """
+        if emitted == 0:
+            return self.first_min_chars
+        return min(self.clause_min_chars * self.clause_growth ** (emitted - 1), self.max_clause_chars)
+
+
+class SentenceSegmenter:
+    """
+    Incremental splitter for streamed LLM text.
+
+    Text is fed as it arrives and complete chunks come back as
+    ``(emotion, text)`` pairs. A scan offset remembers how far the pending
+    buffer has been checked, so every character is examined once however
+    the response is split into tokens. ``[EMOTION]...[/EMOTION]`` tags are
+    stripped and switch the current emotion, even when a tag is split across
+    tokens; one left open for MAX_TAG_CHARS is spoken as text.
+    Abbreviations ("Dr.", "e.g.") and initials do not end a sentence, and
+    decimals or thousands separators never split because a boundary needs
+    whitespace after the punctuation. Sentences may also be cut at
+    clause punctuation as the ChunkingPolicy allows, so speech can start
+    before the full stop arrives. ``stats`` reports how the turn was chunked.
+    """
+
+    def __init__(self, policy=None, emotion="neutral"):
+        self.policy = policy if policy is not None else ChunkingPolicy()
+        self.emotion = emotion
+        self._buffer = ""
+        self._scan = 0
+        self.tokens = 0  # feed() calls so far
+        self.emitted = 0  # chunks emitted so far
+        self.started_at = None  # monotonic time of the first token
+        self.first_chunk_at = None
+        self.first_chunk_chars = 0
+        self.first_chunk_tokens = 0
+
+    def feed(self, text):
+        """
+        Add streamed text and return the chunks it completed.
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        self.tokens += 1
+        # Keep the only reference in a local so CPython can extend it in place.
+        buf, self._buffer = self._buffer, ""
+        buf += text
+        chunks = []
+        while True:
+            match = STOP_PATTERN.search(buf, self._scan)
+            if not match:
+                cut = self.forced_cut(buf)
+                if cut > 0:
+                    self._emit(chunks, buf[:cut])
+                    buf = buf[cut + 1:]
+                    self._scan = 0
+                    continue
+                # Re-check only a trailing punctuation run that may still turn
+                # into a boundary once the next token arrives.
+                scan = len(buf)
+                while scan > self._scan and buf[scan - 1] in TRAILING_PUNCT:
+                    scan -= 1
+                self._scan = scan
+                break
+            token = match.group()
+            if token == "[":
+                tag = EMOTION_TAG_PATTERN.match(buf, match.start())
+                if tag:
+                    self.emotion = tag.group(1).strip().lower() or self.emotion
+                    buf = buf[:match.start()] + buf[tag.end():]
+                    self._scan = match.start()
+                    continue
+                rest = buf[match.start():]
+                if EMOTION_OPEN.startswith(rest):
+                    # Tag still arriving; hold everything from here on.
+                    self._scan = match.start()
+                    break
+                if rest.startswith(EMOTION_OPEN):
+                    if len(rest) <= MAX_TAG_CHARS:
+                        self._scan = match.start()
+                        break
+                    # Never closed: drop the marker and speak the text.
+                    buf = buf[:match.start()] + buf[match.start() + len(EMOTION_OPEN):]
+                    self._scan = match.start()
+                    continue
+                self._scan = match.start() + 1
+                continue
+            if token[0] in ".!?":
+                abbreviation = self.is_abbreviation(buf, match.start())
+                if abbreviation is None:
+                    # Depends on the next word, which has not arrived yet.
+                    self._scan = match.start()
+                    break
+                if abbreviation:
+                    self._scan = match.end()
+                    continue
+            if token[0] in ",;:" or (token[0].isspace() and token.strip()):
+                if len(buf[:match.end()].strip()) < self.policy.clause_threshold(self.emitted):
+                    self._scan = match.end()
+                    continue
+            self._emit(chunks, buf[:match.end()])
+            buf = buf[match.end():]
+            self._scan = 0
+        self._buffer = buf
+        return chunks
+
+    def forced_cut(self, buf):
+        """
+        Index of a space to cut at when no boundary has come in time, or -1.
+        Never cuts inside a held-back tag.
+        """
+        limit = min(len(buf), self._scan if buf[self._scan:self._scan + 1] == "[" else len(buf))
+        first_due = self.emitted == 0 and self.tokens - self.first_chunk_tokens >= self.policy.first_max_tokens
+        if first_due or limit > self.policy.max_chunk_chars:
+            end = limit if first_due else min(limit, self.policy.max_chunk_chars)
+            cut = buf.rfind(" ", 0, end)
+            if cut > 0 and buf[:cut].strip():
+                return cut
+        return -1
+
+    def _emit(self, chunks, text):
+        chunk = text.strip()
+        if not chunk:
+            return
+        if self.emitted == 0:
+            self.first_chunk_at = time.monotonic()
+            self.first_chunk_chars = len(chunk)
+            self.first_chunk_tokens = self.tokens
+        self.emitted += 1
+        chunks.append((self.emotion, chunk))
+
+    def flush(self):
+        """
+        Return whatever is left at the end of the stream.
+        """
+        buf = STRAY_TAG_PATTERN.sub("", EMOTION_TAG_PATTERN.sub("", self._buffer))
+        start = buf.rfind("[")
+        if start != -1 and (EMOTION_OPEN.startswith(buf[start:]) or "[/EMOTION]".startswith(buf[start:])):
+            buf = buf[:start]  # drop a tag cut off mid-marker; text after an unclosed one is kept
+        self._buffer = ""
+        self._scan = 0
+        chunks = []
+        self._emit(chunks, buf)
+        return chunks
+
+    def stats(self):
+        """
+        Per-turn chunking measurements: time from first token to first chunk,
+        its size, and how many chunks the turn produced.
+        """
+        first_chunk_ms = None
+        if self.first_chunk_at is not None and self.started_at is not None:
+            first_chunk_ms = (self.first_chunk_at - self.started_at) * 1000
+        return {
+            "first_chunk_ms": first_chunk_ms,
+            "first_chunk_chars": self.first_chunk_chars,
+            "first_chunk_tokens": self.first_chunk_tokens,
+            "tokens": self.tokens,
+            "chunks": self.emitted,
+        }
+
+    def is_abbreviation(self, buf, end):
+        """
+        True if the period at ``buf[end]`` belongs to an abbreviation or an
+        initial rather than ending a sentence, None while that depends on
+        text not streamed yet.
+        """
+        if buf[end] != ".":
+            return False
+        start = end
+        while start > 0 and not buf[start - 1].isspace():
+            start -= 1
+        word = buf[start:end].lstrip("(\"'“‘").lower()
+        if not word:
+            return False
+        if word in ABBREVIATIONS:
+            return True
+        if word in NUMBER_ABBREVIATIONS:
+            following = buf[end + 1:].lstrip()
+            return following[0].isdigit() if following else None
+        # Single-letter initials such as "J. R. R. Tolkien".
+        return len(word) == 1 and word.isalpha() and buf[end - 1].isupper()
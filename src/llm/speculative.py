@@ -0,0 +1,123 @@
+import re
+import threading
+
+
+def normalize_prompt(text):
+    """
+    Compare transcripts ignoring case, punctuation and spacing differences.
+    """
+    return " ".join(re.sub(r"[^\w']+", " ", text.lower()).split())
+
+
+class SpeculativeRequest:
+    """
+    A chat stream started before the user has finished their turn.
+
+    ``open_stream(text)`` is called on a background thread and every chunk is
+    buffered without being spoken. If the turn ends with the same transcript,
+    iterating the request replays the buffered chunks and then follows the
+    live stream, so nothing is requested twice. Otherwise ``cancel`` stops
+    reading and closes the stream so the abandoned response stops costing
+    tokens.
+    """
+
+    def __init__(self, text, open_stream):
+        self.text = text
+        self.key = normalize_prompt(text)
+        self._open_stream = open_stream
+        self._chunks = []
+        self._cond = threading.Condition()
+        self._done = False
+        self._error = None
+        self.cancelled = False
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def matches(self, text):
+        return self.key == normalize_prompt(text)
+
+    def _pump(self):
+        stream = None
+        try:
+            stream = self._open_stream(self.text)
+            for chunk in stream:
+                if self.cancelled:
+                    break
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            if self.cancelled and stream is not None and hasattr(stream, "close"):
+                stream.close()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify_all()
+
+    def __iter__(self):
+        """
+        Replay buffered chunks, then yield new ones as they arrive.
+        """
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: i < len(self._chunks) or self._done or self.cancelled)
+                if i < len(self._chunks):
+                    chunk = self._chunks[i]
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            i += 1
+            yield chunk
+
+
+class Speculator:
+    """
+    Keeps at most one speculative request alive for the current turn.
+    """
+
+    def __init__(self, open_stream):
+        self._open_stream = open_stream
+        self._lock = threading.Lock()
+        self.current = None
+
+    def speculate(self, text):
+        """
+        Start (or restart) a request for ``text`` unless one is already
+        running for the same transcript.
+        """
+        if not text.strip():
+            return
+        with self._lock:
+            if self.current is not None and self.current.matches(text):
+                return
+            if self.current is not None:
+                self.current.cancel()
+            self.current = SpeculativeRequest(text, self._open_stream)
+
+    def cancel(self):
+        with self._lock:
+            if self.current is not None:
+                self.current.cancel()
+                self.current = None
+
+    def take(self, text):
+        """
+        Hand over the in-flight request if it was made for ``text``; otherwise
+        cancel it and return None.
+        """
+        with self._lock:
+            request, self.current = self.current, None
+        if request is None:
+            return None
+        if request.matches(text) and not request.cancelled:
+            return request
+        request.cancel()
+        return None
@@ -65,3 +65,12 @@ If you are unable to determine the answer from the provided context, state 'I do
 Question: {question}
 Context: {context}
 """
+
+SUMMARY_PROMPT_TEMPLATE = """
+Update the running summary of a conversation between a user and Sophie, their assistant, with the messages below.
+Keep facts, names, decisions, open requests and tool results the assistant may need later; drop small talk.
+Reply with the updated summary only, in at most {max_words} words.
+Current summary: {summary}
+New messages:
+{messages}
+"""
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from queue import Empty, SimpleQueue
+
+
+class EventLoopThread:
+    """
+    One asyncio event loop running on a daemon thread.
+
+    The async core runs every turn as a task on this loop, so cancellation
+    and timeouts are plain task operations and concurrent turns cost tasks,
+    not threads. ``submit`` schedules a coroutine from any thread and returns
+    a concurrent.futures.Future; ``call`` runs a plain callback on the loop.
+    """
+
+    def __init__(self, name="sophie-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout=2.0):
+        if self.running:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+
+class TkBridge:
+    """
+    The single thread-safe way back into Tkinter. Worker threads and event
+    loop tasks ``post(callback, *args)``; the Tk thread runs everything
+    posted every ``interval_ms``, so widgets are only touched from the Tk
+    thread.
+    """
+
+    def __init__(self, widget, interval_ms=20):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self._calls = SimpleQueue()
+        self.widget.after(interval_ms, self._drain)
+
+    def post(self, callback, *args):
+        self._calls.put((callback, args))
+
+    def _drain(self):
+        while True:
+            try:
+                callback, args = self._calls.get_nowait()
+            except Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"UI callback error: {e}")
+        self.widget.after(self.interval_ms, self._drain)
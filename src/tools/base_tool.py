@@ -1,9 +1,45 @@
+import json
 from abc import ABC, abstractmethod
+from typing import ClassVar, Optional, Tuple
 from instructor import OpenAISchema
+from .cache import tool_cache
 
 
 # Define the BaseTool abstract class
 class BaseTool(ABC, OpenAISchema):
+    # Seconds the Agent waits for run(); None uses the Agent's default.
+    timeout: ClassVar[Optional[float]] = None
+    # Tools that act on the user's data (send, add, book). The Agent only
+    # starts them once the model's response is complete.
+    changes_data: ClassVar[bool] = False
+    # Read-only tools opt into result caching with a TTL in seconds. Entries
+    # carry cache_tags; running a tool drops the entries tagged with any of
+    # its `invalidates`.
+    cache_ttl: ClassVar[Optional[float]] = None
+    cache_tags: ClassVar[Tuple[str, ...]] = ()
+    invalidates: ClassVar[Tuple[str, ...]] = ()
+
     @abstractmethod
     def run(self):
         pass
+
+    def cache_key(self):
+        return f"{type(self).__name__}:{json.dumps(self.model_dump(mode='json'), sort_keys=True)}"
+
+    def run_cached(self):
+        """
+        run() through the tool result cache. Only returned results are
+        cached, so a cached tool reports failures by raising.
+        """
+        try:
+            if self.cache_ttl is None:
+                return self.run()
+            key = self.cache_key()
+            result = tool_cache.get(key)
+            if result is None:
+                result = self.run()
+                tool_cache.put(key, result, self.cache_ttl, self.cache_tags)
+            return result
+        finally:
+            # Even when a change fails, it may have partly gone through.
+            tool_cache.invalidate(self.invalidates)
@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+TOOL_CACHE_ENTRIES = 512
+# SQLite file that keeps cached tool results across restarts; unset keeps
+# them in memory only.
+TOOL_CACHE_PATH = os.getenv("SOPHIE_TOOL_CACHE") or None
+
+
+class ToolCache:
+    """
+    Results of read-only tools, keyed by tool and arguments.
+
+    Entries expire after the TTL they were stored with and the least
+    recently used ones are dropped beyond ``max_entries``. Each entry
+    carries the tags of its tool, so a tool that changes data (adding a
+    contact, say) can drop every entry that may now be stale. With a
+    ``path`` the entries are written through to SQLite and loaded again on
+    start.
+    """
+
+    def __init__(self, max_entries=TOOL_CACHE_ENTRIES, path=TOOL_CACHE_PATH):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        The cached value, or None if absent or expired.
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._drop([key])
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, ttl, tags=()):
+        entry = (time.time() + ttl, tuple(tags), value)
+        with self._lock:
+            self._load()
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._persist(key, entry, evicted)
+
+    def invalidate(self, tags):
+        """
+        Drop every entry carrying any of ``tags``.
+        """
+        tags = set(tags)
+        if not tags:
+            return
+        with self._lock:
+            self._load()
+            self._drop([key for key, (_, entry_tags, _) in self._entries.items() if tags.intersection(entry_tags)])
+
+    def clear(self):
+        with self._lock:
+            self._drop(list(self._entries))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _drop(self, keys):
+        for key in keys:
+            self._entries.pop(key, None)
+        self._write(None, keys)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, expires REAL, tags TEXT, value TEXT)")
+        return db
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        db = self._connect()
+        try:
+            rows = db.execute("SELECT key, expires, tags, value FROM results WHERE expires > ? ORDER BY expires",
+                              (time.time(),)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Tool cache load failed: {e}")
+            return
+        finally:
+            db.close()
+        for key, expires, tags, value in rows[-self.max_entries:]:
+            self._entries[key] = (expires, tuple(json.loads(tags)), json.loads(value))
+
+    def _persist(self, key, entry, evicted):
+        expires, tags, value = entry
+        try:
+            value = json.dumps(value)
+        except TypeError:
+            value = None  # not JSON; cached in memory only
+        self._write((key, expires, json.dumps(tags), value) if value else None, evicted)
+
+    def _write(self, row, deleted):
+        if not self.path or not (row or deleted):
+            return
+        db = self._connect()
+        try:
+            with db:
+                db.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+                db.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in deleted])
+                if row:
+                    db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", row)
+        except sqlite3.Error as e:
+            # Memory stays authoritative for this process.
+            print(f"Tool cache write failed: {e}")
+        finally:
+            db.close()
+
+
+tool_cache = ToolCache()
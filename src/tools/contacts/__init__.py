@@ -1,4 +1,5 @@
 from .add_contact_tool import AddContactTool
 from .fetch_contact_tool import FetchContactTool
+from .index import Contact, ContactIndex, contact_index
 
-__all__ = ['AddContactTool', 'FetchContactTool']
+__all__ = ['AddContactTool', 'FetchContactTool', 'Contact', 'ContactIndex', 'contact_index']
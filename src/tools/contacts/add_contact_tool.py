@@ -1,12 +1,8 @@
-import os
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
 from pydantic import Field
 from ..base_tool import BaseTool
-from src.utils import SCOPES
+from ..google_services import google_service
+from .index import Contact, contact_index
 
 class AddContactTool(BaseTool):
     """
@@ -15,32 +11,15 @@ class AddContactTool(BaseTool):
     name: str = Field(description='Full name of the contact')
     phone: str = Field(description='Phone number of the contact')
     email: str = Field(default=None, description='Email address of the contact (optional)')
-
-    def get_credentials(self):
-        """
-        Get and refresh Google Contacts API credentials
-        """
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        return creds
+    changes_data = True
+    invalidates = ("contacts",)
 
     def add_contact(self):
         """
         Adds a new contact to Google Contacts
         """
         try:
-            creds = self.get_credentials()
-            service = build('people', 'v1', credentials=creds)
+            service = google_service('people', 'v1')
 
             contact_body = {
                 "names": [{"givenName": self.name}],
@@ -51,6 +30,10 @@ class AddContactTool(BaseTool):
                 contact_body["emailAddresses"] = [{"value": self.email}]
 
             contact = service.people().createContact(body=contact_body).execute()
+            # Searchable right away, without waiting for the next sync.
+            contact_index.upsert(Contact(
+                contact['resourceName'], self.name, (self.phone,), (self.email,) if self.email else (),
+            ))
 
             return f"Contact added successfully. Contact ID: {contact.get('resourceName')}"
 
@@ -0,0 +1,267 @@
+import bisect
+import difflib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import NamedTuple, Tuple
+from googleapiclient.errors import HttpError
+from ..cache import tool_cache
+from ..google_services import google_service
+
+PERSON_FIELDS = "names,phoneNumbers,emailAddresses"
+
+
+class Contact(NamedTuple):
+    """
+    One Google contact as stored in the local index.
+    """
+    resource_name: str
+    name: str
+    phone_numbers: Tuple[str, ...] = ()
+    emails: Tuple[str, ...] = ()
+
+    def to_dict(self):
+        return {'name': self.name, 'phone_numbers': list(self.phone_numbers), 'emails': list(self.emails)}
+
+
+def name_tokens(text):
+    """
+    Lowercase, accent-free words of a name, for matching.
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"\w+", text)
+
+
+def parse_person(person):
+    names = person.get('names', [])
+    return Contact(
+        person['resourceName'],
+        names[0].get('displayName', '') if names else '',
+        tuple(phone['value'] for phone in person.get('phoneNumbers', []) if phone.get('value')),
+        tuple(email['value'] for email in person.get('emailAddresses', []) if email.get('value')),
+    )
+
+
+class ContactIndex:
+    """
+    Local copy of the user's Google contacts with name search.
+
+    The first sync lists every connection; later syncs send the stored sync
+    token and only receive what changed (a full sync runs again if the
+    token has expired). Contacts and the token are persisted in SQLite at
+    ``path`` so a restart does not start from scratch. Lookups never touch
+    the network: an empty index syncs once in the foreground, a stale one
+    (older than ``max_age`` seconds) is refreshed in the background while
+    the current data answers.
+
+    Names are indexed by word. A query matches when every query word
+    matches a word of the name exactly, as a prefix, or failing both, as a
+    close spelling.
+    """
+
+    def __init__(self, path="contacts.db", max_age=300, fuzzy_cutoff=0.8):
+        self.path = path
+        self.max_age = max_age
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._contacts = {}  # resource_name -> Contact
+        self._tokens = {}  # word -> {resource_name}
+        self._words = []  # sorted words, for prefix search
+        self._sync_token = None
+        self._synced_at = None  # monotonic time of the last successful sync
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+
+    def search(self, query, limit=5):
+        """
+        Best matching Contacts for ``query``, best first.
+        """
+        return [contact for _, contact in self.search_scored(query, limit)]
+
+    def search_scored(self, query, limit=5):
+        """
+        ``(score, Contact)`` pairs for ``query``, best first. Equal scores
+        mean equally good matches.
+        """
+        words = name_tokens(query)
+        if not words:
+            return []
+        self.refresh_if_stale()
+        with self._lock:
+            scores = None
+            for word in words:
+                matched = self._match_word(word)
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {name: scores[name] + score for name, score in matched.items() if name in scores}
+                if not scores:
+                    return []
+            for resource_name in scores:
+                if name_tokens(self._contacts[resource_name].name) == words:
+                    scores[resource_name] += 10  # whole name typed exactly
+            ranked = sorted(scores, key=lambda name: (-scores[name], self._contacts[name].name))
+            return [(scores[name], self._contacts[name]) for name in ranked[:limit]]
+
+    def _match_word(self, word):
+        matched = {name: 3 for name in self._tokens.get(word, ())}
+        start = bisect.bisect_left(self._words, word)
+        for candidate in self._words[start:]:
+            if not candidate.startswith(word):
+                break
+            for name in self._tokens[candidate]:
+                matched.setdefault(name, 2)
+        if not matched:
+            for candidate in difflib.get_close_matches(word, self._words, n=5, cutoff=self.fuzzy_cutoff):
+                for name in self._tokens[candidate]:
+                    matched.setdefault(name, 1)
+        return matched
+
+    def get(self, resource_name):
+        with self._lock:
+            return self._contacts.get(resource_name)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._contacts)
+
+    def upsert(self, contact):
+        """
+        Add or replace one contact locally, e.g. right after creating it.
+        """
+        self._apply([contact], [], replace=False)
+        self._persist([contact], [], None, replace=False)
+
+    def _apply(self, changed, deleted, replace):
+        if changed or deleted or replace:
+            # Cached FetchContactTool results may now be stale.
+            tool_cache.invalidate(["contacts"])
+        with self._lock:
+            if replace:
+                self._contacts = {}
+                self._tokens = {}
+            for resource_name in deleted:
+                self._remove(resource_name)
+            for contact in changed:
+                self._remove(contact.resource_name)
+                self._contacts[contact.resource_name] = contact
+                for word in set(name_tokens(contact.name)):
+                    self._tokens.setdefault(word, set()).add(contact.resource_name)
+            self._words = sorted(self._tokens)
+
+    def _remove(self, resource_name):
+        contact = self._contacts.pop(resource_name, None)
+        if contact is None:
+            return
+        for word in set(name_tokens(contact.name)):
+            names = self._tokens.get(word)
+            if names is not None:
+                names.discard(resource_name)
+                if not names:
+                    del self._tokens[word]
+
+    def refresh_if_stale(self):
+        self._load()
+        if self._synced_at is None and not self._contacts:
+            self.sync()
+        elif self._synced_at is None or time.monotonic() - self._synced_at > self.max_age:
+            if not self._sync_lock.locked():
+                threading.Thread(target=self._sync_quietly, daemon=True).start()
+
+    def _sync_quietly(self):
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"Contact sync failed: {e}")
+
+    def sync(self):
+        """
+        Bring the index up to date: incremental when a sync token is held,
+        full otherwise.
+        """
+        with self._sync_lock:
+            self._load()
+            service = google_service('people', 'v1')
+            replace = self._sync_token is None
+            try:
+                people, sync_token = self._list(service, self._sync_token)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                # Sync tokens expire after a few days; start over.
+                replace = True
+                people, sync_token = self._list(service, None)
+            changed, deleted = [], []
+            for person in people:
+                if person.get('metadata', {}).get('deleted'):
+                    deleted.append(person['resourceName'])
+                else:
+                    changed.append(parse_person(person))
+            self._apply(changed, deleted, replace)
+            self._persist(changed, deleted, sync_token, replace)
+            self._sync_token = sync_token
+            self._synced_at = time.monotonic()
+
+    def _list(self, service, sync_token):
+        people, page_token = [], None
+        while True:
+            params = dict(resourceName='people/me', personFields=PERSON_FIELDS, pageSize=1000,
+                          requestSyncToken=True)
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
+            response = service.people().connections().list(**params).execute()
+            people.extend(response.get('connections', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return people, response.get('nextSyncToken')
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("CREATE TABLE IF NOT EXISTS contacts "
+                   "(resource_name TEXT PRIMARY KEY, name TEXT, phone_numbers TEXT, emails TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return db
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path or not os.path.exists(self.path):
+                return
+            db = self._connect()
+            try:
+                rows = db.execute("SELECT resource_name, name, phone_numbers, emails FROM contacts").fetchall()
+                token = db.execute("SELECT value FROM meta WHERE key = 'sync_token'").fetchone()
+            finally:
+                db.close()
+            self._apply([Contact(r[0], r[1], tuple(json.loads(r[2])), tuple(json.loads(r[3]))) for r in rows],
+                        [], replace=True)
+            self._sync_token = token[0] if token else None
+
+    def _persist(self, changed, deleted, sync_token, replace):
+        if not self.path:
+            return
+        db = self._connect()
+        try:
+            with db:
+                if replace:
+                    db.execute("DELETE FROM contacts")
+                db.executemany("DELETE FROM contacts WHERE resource_name = ?", [(name,) for name in deleted])
+                db.executemany(
+                    "INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)",
+                    [(c.resource_name, c.name, json.dumps(c.phone_numbers), json.dumps(c.emails)) for c in changed],
+                )
+                if sync_token:
+                    db.execute("INSERT OR REPLACE INTO meta VALUES ('sync_token', ?)", (sync_token,))
+        finally:
+            db.close()
+
+
+contact_index = ContactIndex(os.getenv("SOPHIE_CONTACTS_DB", "contacts.db"))
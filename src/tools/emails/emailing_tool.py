@@ -1,10 +1,10 @@
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pydantic import Field
 from ..base_tool import BaseTool
-from src.tools.contacts import FetchContactTool
+from src.tools.contacts import contact_index
+from src.connections import smtp
 
 class EmailingTool(BaseTool):
     """
@@ -13,19 +13,25 @@ class EmailingTool(BaseTool):
     recipient_name: str = Field(description='Name of the email recipient')
     subject: str = Field(description='Subject of the email')
     body: str = Field(description='Body content of the email')
+    changes_data = True
 
     def fetch_recipient_email(self):
         """
-        Fetches the email address of the recipient using FetchContactTool
+        Fetches the email address of the recipient from the contact index.
+        Only the single best match is used; a weaker match is never emailed
+        in its place.
         """
         try:
-            fetch_contact_tool = FetchContactTool(contact_name=self.recipient_name)
-            result = fetch_contact_tool.run()
-            contact_info = eval(result)
-            email = contact_info[0].get('emails', [None])[0]
-            if not email:
-                raise ValueError(f"No email found for contact: {self.recipient_name}")
-            return email
+            matches = contact_index.search_scored(self.recipient_name)
+            if not matches:
+                raise ValueError(f"No contact found with the name: {self.recipient_name}")
+            best_score, contact = matches[0]
+            tied = [other.name for score, other in matches if score == best_score]
+            if len(tied) > 1:
+                raise ValueError(f"Several contacts match equally well: {', '.join(tied)}. Ask which one is meant")
+            if not contact.emails:
+                raise ValueError(f"No email found for contact: {contact.name}")
+            return contact.emails[0]
         except Exception as e:
             raise ValueError(f"Failed to fetch email for {self.recipient_name}: {e}")
 
@@ -43,11 +49,9 @@ class EmailingTool(BaseTool):
             msg['Subject'] = self.subject
             msg.attach(MIMEText(self.body, 'plain'))
 
-            server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-            server.login(sender_email, app_password)
-            text = msg.as_string()
-            server.sendmail(sender_email, recipient_email, text)
-            server.quit()
+            # Reuses one logged-in connection instead of a TLS handshake and
+            # login per email.
+            smtp.sendmail(sender_email, app_password, sender_email, recipient_email, msg.as_string())
             return "Email sent successfully."
         except Exception as e:
             return f"Email was not sent successfully, error: {e}"
@@ -0,0 +1,108 @@
+import datetime
+import os
+import threading
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from src.connections import google_http, google_request
+from src.utils import SCOPES
+
+
+class GoogleCredentials:
+    """
+    OAuth credentials shared by every Google tool.
+
+    ``token.json`` is read once and the credentials stay in memory. They are
+    refreshed ``refresh_margin`` seconds before they expire, by a background
+    timer, so no tool call waits for a refresh, and the file is only
+    rewritten when the token actually changes.
+    """
+
+    def __init__(self, token_path="token.json", secrets_path="credentials.json", scopes=SCOPES,
+                 refresh_margin=300):
+        self.token_path = token_path
+        self.secrets_path = secrets_path
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+        self._creds = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Valid credentials, loading, authorizing or refreshing only when needed.
+        """
+        with self._lock:
+            if self._creds is None and os.path.exists(self.token_path):
+                self._creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
+                self._schedule()
+            if self._creds is None or not (self._creds.valid or self._creds.refresh_token):
+                flow = InstalledAppFlow.from_client_secrets_file(self.secrets_path, self.scopes)
+                self._creds = flow.run_local_server(port=0)
+                self._save()
+            elif self._expiring():
+                self._refresh()
+            return self._creds
+
+    def _expiring(self):
+        if not self._creds.valid:
+            return True
+        if self._creds.expiry is None:
+            return False
+        # google-auth keeps expiry as naive UTC.
+        remaining = self._creds.expiry - datetime.datetime.utcnow()
+        return remaining.total_seconds() < self.refresh_margin
+
+    def _refresh(self):
+        self._creds.refresh(google_request())
+        self._save()
+
+    def _save(self):
+        with open(self.token_path, "w") as token:
+            token.write(self._creds.to_json())
+        self._schedule()
+
+    def _schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._creds.expiry is None or not self._creds.refresh_token:
+            return
+        remaining = (self._creds.expiry - datetime.datetime.utcnow()).total_seconds()
+        self._timer = threading.Timer(max(0.0, remaining - self.refresh_margin), self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            with self._lock:
+                if self._expiring():
+                    self._refresh()
+        except Exception as e:
+            # The next get() refreshes on demand instead.
+            print(f"Google token refresh failed: {e}")
+
+
+credentials = GoogleCredentials()
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _build_request(http, *args, **kwargs):
+    # Every request gets the current credentials on the calling thread's
+    # keep-alive transport, so one cached service is safe from any thread.
+    return HttpRequest(google_http(credentials.get()), *args, **kwargs)
+
+
+def google_service(name, version):
+    """
+    Process-wide cached API client (e.g. "calendar", "v3"). The discovery
+    document is parsed once per process instead of on every tool call.
+    """
+    key = (name, version)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = build(name, version, http=google_http(credentials.get()),
+                                   requestBuilder=_build_request, cache_discovery=False)
+        return _services[key]
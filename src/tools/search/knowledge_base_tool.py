@@ -1,4 +1,5 @@
 import os
+import threading
 from pydantic import Field
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
@@ -9,16 +10,17 @@ from langchain_core.output_parsers import StrOutputParser
 from src.prompts.prompts import RAG_SEARCH_PROMPT_TEMPLATE
 from ..base_tool import BaseTool
 
+_retriever = None
+_retriever_lock = threading.Lock()
+
 class KnowledgeSearchTool(BaseTool):
     """
     A tool that searches a knowledge base and answers user queries based on the stored information.
     """
 
     query: str = Field(description="User's query to search in the knowledge base")
-
-    def __init__(self):
-        super().__init__()
-        self.retriever = self.load_retriever()
+    cache_ttl = 3600
+    cache_tags = ("knowledge",)
 
     def load_retriever(self):
         embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
@@ -36,7 +38,13 @@ class KnowledgeSearchTool(BaseTool):
         return app
 
     def search_knowledge_base(self, query: str) -> str:
-        response = self.retriever.invoke(query)
+        global _retriever
+        # Built once per process; the tool itself is created per call, and
+        # parallel calls must not each build their own.
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = self.load_retriever()
+        response = _retriever.invoke(query)
         return str(response)
 
     def run(self):
@@ -1,13 +1,15 @@
 import os
 from pydantic import Field
 from ..base_tool import BaseTool
-from tavily import TavilyClient
+from src.connections import TAVILY_SEARCH_URL, http_session
 
 class SearchWebTool(BaseTool):
     """
     A tool that searches the internet and get up to date information for a given query
     """
     query: str = Field(description='Search query string')
+    cache_ttl = 600
+    cache_tags = ("web",)
 
     def search_web(self, query: str):
         """
@@ -15,12 +17,18 @@ class SearchWebTool(BaseTool):
         @param query The search query.
         @return content The combined content from the search results.
         """
-        # Initialize the Tavily client for searching internet
-        tavily = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+        # Tavily REST API over the pooled keep-alive session; the SDK opens a
+        # new connection for every search.
+        response = http_session().post(
+            TAVILY_SEARCH_URL,
+            json={"query": query, "max_results": 4},
+            headers={"Authorization": f"Bearer {os.environ['TAVILY_API_KEY']}"},
+            timeout=30,
+        )
+        response.raise_for_status()
 
         content = ""
-        response = tavily.search(query=query, max_results=4)
-        for r in response['results']:
+        for r in response.json()['results']:
             content += r['content']
         return content
     
@@ -0,0 +1,152 @@
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+# Pipeline stages, in the order a turn normally reaches them.
+STAGES = [
+    "capture_start",          # recording started
+    "end_of_speech",          # VAD end of turn or the stop button
+    "transcription_done",     # final transcript assembled
+    "llm_request",            # chat stream requested (or speculative one reused)
+    "first_token",            # first content token received
+    "first_sentence_queued",  # first chunk handed to TTS
+    "first_audio",            # first audio written to the output device
+    "playback_done",          # last audio of the turn played
+]
+
+# Named spans reported in the JSONL export and the histograms.
+SPANS = {
+    "stt_tail": ("end_of_speech", "transcription_done"),
+    "llm_first_token": ("llm_request", "first_token"),
+    "first_sentence": ("first_token", "first_sentence_queued"),
+    "tts_first_audio": ("first_sentence_queued", "first_audio"),
+    "time_to_first_token": ("end_of_speech", "first_token"),
+    "time_to_first_audio": ("end_of_speech", "first_audio"),
+    "turn_total": ("end_of_speech", "playback_done"),
+}
+
+
+class LatencyHistogram:
+    """
+    Keeps the most recent ``window`` samples of each span and reports
+    percentiles over them.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, value_ms):
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(value_ms)
+
+    def summary(self):
+        """
+        {span: {"count", "p50", "p95", "p99"}} in milliseconds
+        """
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self._samples.items()}
+        return {name: {"count": len(values), **{f"p{p}": percentile(values, p) for p in (50, 95, 99)}}
+                for name, values in snapshot.items() if values}
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list.
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class TurnTrace:
+    """
+    Monotonic timestamps for one turn. Each stage keeps its first mark, so
+    stages can be marked from any thread without coordination.
+    """
+
+    def __init__(self, tracer, turn_id):
+        self.tracer = tracer
+        self.id = turn_id
+        self.started_at = datetime.now(timezone.utc)
+        self.marks = {}
+        self.details = {}  # extra per-turn measurements exported with the record
+        self.cancelled = False
+        self._ended = False
+        self._lock = threading.Lock()
+
+    def mark(self, stage, at=None):
+        """
+        Record ``stage`` now, or at monotonic time ``at`` when the event is
+        known to have happened earlier.
+        """
+        self.marks.setdefault(stage, time.monotonic() if at is None else at)
+
+    def span_ms(self, start, end):
+        if start in self.marks and end in self.marks:
+            return (self.marks[end] - self.marks[start]) * 1000
+        return None
+
+    def end(self, cancelled=False):
+        """
+        Close the turn: export it and add its spans to the histograms. Only
+        the first call has any effect.
+        """
+        with self._lock:
+            if self._ended:
+                return
+            self._ended = True
+        self.cancelled = cancelled
+        self.tracer.record(self)
+
+    def to_dict(self):
+        origin = min(self.marks.values()) if self.marks else 0.0
+        spans = {name: self.span_ms(start, end) for name, (start, end) in SPANS.items()}
+        return {
+            "turn": self.id,
+            "started_at": self.started_at.isoformat(),
+            "cancelled": self.cancelled,
+            "marks_ms": {stage: round((ts - origin) * 1000, 2)
+                         for stage, ts in sorted(self.marks.items(), key=lambda item: item[1])},
+            "spans_ms": {name: round(value, 2) for name, value in spans.items() if value is not None},
+            **self.details,
+        }
+
+
+class Tracer:
+    """
+    Hands out TurnTraces, appends finished turns to a JSONL file (if
+    ``path`` is set) and keeps in-process latency histograms.
+    """
+
+    def __init__(self, path=None, window=1000):
+        self.path = path
+        self.histogram = LatencyHistogram(window)
+        self._ids = itertools.count(1)
+        self._file_lock = threading.Lock()
+
+    def start_turn(self):
+        trace = TurnTrace(self, next(self._ids))
+        trace.mark("capture_start")
+        return trace
+
+    def record(self, trace):
+        record = trace.to_dict()
+        if not trace.cancelled:
+            for name, value in record["spans_ms"].items():
+                self.histogram.add(name, value)
+        if self.path:
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def summary(self):
+        return self.histogram.summary()
+
+    def format_summary(self):
+        lines = []
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<22} n={stats['count']:<5} p50={stats['p50']:8.1f} ms "
+                         f"p95={stats['p95']:8.1f} ms p99={stats['p99']:8.1f} ms")
+        return "\n".join(lines)
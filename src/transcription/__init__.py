@@ -0,0 +1,13 @@
+from .base_transcriber import BaseTranscriber, TranscriptSegment
+from .openai_transcriber import OpenAITranscriber
+from .scripted_transcriber import ScriptedTranscriber
+from .whisper_transcriber import WhisperTranscriber
+from .pipeline import AsyncTranscriptionPipeline, TranscriptionPipeline
+from .stabilizer import StreamingTranscript
+from .factory import build_transcriber
+
+__all__ = [
+    'BaseTranscriber', 'TranscriptSegment', 'OpenAITranscriber', 'ScriptedTranscriber',
+    'WhisperTranscriber', 'TranscriptionPipeline', 'AsyncTranscriptionPipeline', 'StreamingTranscript',
+    'build_transcriber',
+]
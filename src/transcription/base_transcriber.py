@@ -0,0 +1,46 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+
+class TranscriptSegment(NamedTuple):
+    """
+    A piece of transcript with its position in the submitted audio, in
+    seconds. ``final`` is False for a trailing segment that may still change
+    once more audio arrives.
+    """
+    start: float
+    end: float
+    text: str
+    final: bool = True
+
+
+# Define the BaseTranscriber abstract class
+class BaseTranscriber(ABC):
+    """
+    Speech-to-text backend. Implementations receive raw int16 PCM straight
+    from memory and return the recognized text.
+    """
+
+    @abstractmethod
+    def transcribe(self, pcm, sample_rate):
+        pass
+
+    async def atranscribe(self, pcm, sample_rate):
+        """
+        Coroutine version of ``transcribe`` for the event-loop core. Backends
+        without a native async client run ``transcribe`` on a worker thread.
+        """
+        return await asyncio.to_thread(self.transcribe, pcm, sample_rate)
+
+    def stream(self, pcm, sample_rate, offset=0.0):
+        """
+        Yield TranscriptSegments as they are recognized, with times shifted by
+        ``offset`` seconds. Backends without timestamps return the whole chunk
+        as one final segment.
+        """
+        text = self.transcribe(pcm, sample_rate)
+        if text:
+            parts = pcm if isinstance(pcm, (list, tuple)) else [pcm]
+            duration = sum(len(part) for part in parts) / sample_rate
+            yield TranscriptSegment(offset, offset + duration, text)
@@ -0,0 +1,14 @@
+from .openai_transcriber import OpenAITranscriber
+from .whisper_transcriber import WhisperTranscriber
+
+
+def build_transcriber(backend, audio_format="wav", num_workers=3):
+    """
+    Speech-to-text engine for a SOPHIE_STT_BACKEND value: "openai" (hosted
+    API) or "local" (faster-whisper).
+    """
+    if backend == "local":
+        return WhisperTranscriber(num_workers=num_workers)
+    if backend == "openai":
+        return OpenAITranscriber(audio_format=audio_format)
+    raise ValueError(f"Unknown SOPHIE_STT_BACKEND: {backend}. Use 'openai' or 'local'.")
@@ -0,0 +1,27 @@
+import openai
+from src.audio import encode_audio
+from src.connections import use_aio_session
+from .base_transcriber import BaseTranscriber
+
+
+class OpenAITranscriber(BaseTranscriber):
+    """
+    Transcribes audio with the OpenAI transcription endpoint. PCM is wrapped
+    in an in-memory container ("wav", or lossless "flac" for smaller uploads)
+    and uploaded without touching the disk.
+    """
+
+    def __init__(self, model="gpt-4o-mini-transcribe", audio_format="wav"):
+        self.model = model
+        self.audio_format = audio_format
+
+    def transcribe(self, pcm, sample_rate):
+        audio_file = encode_audio(pcm, sample_rate, self.audio_format)
+        transcript = openai.Audio.transcribe(self.model, audio_file)
+        return transcript["text"].strip()
+
+    async def atranscribe(self, pcm, sample_rate):
+        audio_file = encode_audio(pcm, sample_rate, self.audio_format)
+        use_aio_session()
+        transcript = await openai.Audio.atranscribe(self.model, audio_file)
+        return transcript["text"].strip()
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OrderedResults:
+    """
+    Delivery shared by the transcription pipelines: results arrive in any
+    order and reach ``on_result(text, tag)`` in submission order.
+    """
+
+    def __init__(self, on_result=None):
+        self.on_result = on_result
+        self._pending = {}  # seq -> (text, tag) finished out of order
+        self._next_seq = 0  # next sequence number to deliver
+        self.texts = []  # delivered text, in order
+
+    def _deliver(self, seq, text, tag):
+        self._pending[seq] = (text, tag)
+        # Deliver every result that is now contiguous with what was sent.
+        while self._next_seq in self._pending:
+            text, tag = self._pending.pop(self._next_seq)
+            self.texts.append(text)
+            if self.on_result is not None:
+                try:
+                    self.on_result(text, tag)
+                except Exception as e:
+                    print(f"Transcript callback error: {e}")
+            self._next_seq += 1
+
+
+class TranscriptionPipeline(OrderedResults):
+    """
+    Transcribes chunks on a bounded worker pool and hands the text back in
+    submission order.
+
+    ``submit`` blocks once ``max_in_flight`` chunks are outstanding, which
+    throttles the producer instead of queueing audio without limit. Results
+    that finish early are held until every earlier chunk has been delivered,
+    so ``on_result(text, tag)`` always sees the transcript in speaking order.
+    """
+
+    def __init__(self, transcriber, on_result=None, max_workers=3, max_in_flight=4):
+        super().__init__(on_result)
+        self.transcriber = transcriber
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcribe")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._running = 0  # requests currently in flight
+
+    def submit(self, pcm, sample_rate, tag=None):
+        """
+        Queue a chunk for transcription, waiting for a free slot if needed.
+        """
+        self._slots.acquire()
+        with self._cond:
+            seq = self._submitted
+            self._submitted += 1
+            self._running += 1
+        future = self._executor.submit(self.transcriber.transcribe, pcm, sample_rate)
+        future.add_done_callback(lambda f: self._finish(seq, f, tag))
+        return seq
+
+    def _finish(self, seq, future, tag):
+        try:
+            text = future.result()
+        except Exception as e:
+            print(f"Chunk error: {e}")
+            text = ""
+        self._slots.release()
+        with self._cond:
+            self._running -= 1
+            self._deliver(seq, text, tag)
+            self._cond.notify_all()
+
+    @property
+    def in_flight(self):
+        with self._cond:
+            return self._running
+
+    @property
+    def idle(self):
+        """
+        True when every submitted chunk has been delivered
+        """
+        with self._cond:
+            return self._next_seq == self._submitted
+
+    def drain(self, timeout=None):
+        """
+        Wait until every submitted chunk has been delivered. Returns False on
+        timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._next_seq == self._submitted, timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class AsyncTranscriptionPipeline(OrderedResults):
+    """
+    asyncio counterpart of TranscriptionPipeline for the event-loop core.
+
+    Chunks are transcribed concurrently with ``transcriber.atranscribe``;
+    ``submit`` waits once ``max_in_flight`` are outstanding and results are
+    delivered to ``on_result(text, tag)`` in submission order. Create it on
+    the loop that will run it.
+    """
+
+    def __init__(self, transcriber, on_result=None, max_in_flight=4):
+        super().__init__(on_result)
+        self.transcriber = transcriber
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = []
+        self._running = 0
+
+    async def submit(self, pcm, sample_rate, tag=None):
+        """
+        Start transcribing a chunk, waiting for a free slot if needed.
+        """
+        await self._slots.acquire()
+        seq = len(self._tasks)
+        self._running += 1
+        self._tasks.append(asyncio.ensure_future(self._transcribe(seq, pcm, sample_rate, tag)))
+        return seq
+
+    async def _transcribe(self, seq, pcm, sample_rate, tag):
+        try:
+            text = await self.transcriber.atranscribe(pcm, sample_rate)
+        except Exception as e:
+            print(f"Chunk error: {e}")
+            text = ""
+        finally:
+            self._running -= 1
+            self._slots.release()
+        self._deliver(seq, text, tag)
+
+    @property
+    def in_flight(self):
+        return self._running
+
+    @property
+    def idle(self):
+        """
+        True when every submitted chunk has been delivered
+        """
+        return self._next_seq == len(self._tasks)
+
+    async def drain(self, timeout=None):
+        """
+        Wait until every submitted chunk has been delivered. Returns False on
+        timeout.
+        """
+        if not self._tasks:
+            return True
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        return not pending
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,23 @@
+import time
+from .base_transcriber import BaseTranscriber
+
+
+class ScriptedTranscriber(BaseTranscriber):
+    """
+    Local stand-in backend that returns canned transcripts in order, for tests
+    and benchmarks that must run without network access.
+    """
+
+    def __init__(self, responses=None, latency=0.0):
+        self.responses = list(responses or [])
+        self.latency = latency  # seconds to sleep per call, to mimic the API
+        self.calls = []  # (frames, sample_rate) of every request received
+
+    def transcribe(self, pcm, sample_rate):
+        parts = pcm if isinstance(pcm, (list, tuple)) else [pcm]
+        self.calls.append((sum(len(part) for part in parts), sample_rate))
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.responses:
+            return ""
+        return self.responses.pop(0)
@@ -0,0 +1,144 @@
+import re
+import numpy as np
+from src.audio import resample_pcm
+from .base_transcriber import TranscriptSegment
+
+STREAM_RATE = 16000
+
+
+def split_words(segments):
+    """
+    Break TranscriptSegments into (start, end, word) triples, spreading each
+    segment's time span evenly over its words.
+    """
+    words = []
+    for segment in segments:
+        tokens = segment.text.split()
+        if not tokens:
+            continue
+        step = (segment.end - segment.start) / len(tokens)
+        for i, token in enumerate(tokens):
+            words.append((segment.start + i * step, segment.start + (i + 1) * step, token))
+    return words
+
+
+def normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class StreamingTranscript:
+    """
+    Live transcript built with local agreement over a sliding window.
+
+    Every ``update`` re-decodes the audio since the last committed word (never
+    more than ``max_window`` seconds) and compares the result with the
+    previous hypothesis. Only the prefix both decodes agree on is committed;
+    the rest stays tentative and is shown but may still change. Committed text
+    is kept as an append-only list of segments and the audio behind it is
+    dropped, so each decode stays short however long the user talks.
+    """
+
+    def __init__(self, transcriber, max_window=8.0):
+        self.transcriber = transcriber
+        self.max_window = max_window
+        self.committed = []  # TranscriptSegments, append-only
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the audio and tentative words of the current utterance; committed
+        segments are kept.
+        """
+        self._audio = np.empty(0, dtype=np.int16)
+        self._audio_start = None  # absolute time (s) of the first buffered sample
+        self._committed_until = 0.0
+        self._tentative = []
+
+    @property
+    def committed_text(self):
+        return " ".join(segment.text for segment in self.committed)
+
+    @property
+    def tentative_text(self):
+        return " ".join(word for _, _, word in self._tentative)
+
+    @property
+    def text(self):
+        """
+        Committed text followed by the current unstable tail, for display
+        """
+        return " ".join(part for part in (self.committed_text, self.tentative_text) if part)
+
+    def update(self, pcm, sample_rate, start_time):
+        """
+        Add audio that begins at absolute ``start_time`` seconds, re-decode the
+        window and return the segments newly committed by agreement.
+        """
+        self._append(pcm, sample_rate, start_time)
+        hypothesis = self._decode()
+        agreed = 0
+        for old, new in zip(self._tentative, hypothesis):
+            if normalize(old[2]) != normalize(new[2]):
+                break
+            agreed += 1
+        new_segments = self._commit(hypothesis[:agreed])
+        self._tentative = hypothesis[agreed:]
+
+        if self._duration() > self.max_window:
+            if not new_segments and len(self._tentative) > 1:
+                # Nothing has stabilized in a whole window; commit all but the
+                # last word rather than let the window grow.
+                new_segments = self._commit(self._tentative[:-1])
+                self._tentative = self._tentative[-1:]
+            self._trim()
+        return new_segments
+
+    def finish(self, pcm=None, sample_rate=STREAM_RATE, start_time=None):
+        """
+        End of utterance: decode the remaining audio once more, commit all of
+        it and start afresh.
+        """
+        if pcm is not None:
+            self._append(pcm, sample_rate, start_time)
+        new_segments = self._commit(self._decode()) if len(self._audio) else []
+        self.reset()
+        return new_segments
+
+    def _append(self, pcm, sample_rate, start_time):
+        data = resample_pcm(pcm, sample_rate, STREAM_RATE)
+        if self._audio_start is None:
+            self._audio_start = start_time
+            self._committed_until = max(self._committed_until, start_time)
+        self._audio = np.concatenate([self._audio, data])
+
+    def _duration(self):
+        return len(self._audio) / STREAM_RATE
+
+    def _decode(self):
+        segments = self.transcriber.stream(self._audio, STREAM_RATE, offset=self._audio_start)
+        words = [word for word in split_words(segments) if word[1] > self._committed_until + 0.05]
+        # The window still holds the tail of already-committed speech; skip a
+        # repeat of the last few committed words at the start of the decode.
+        tail = [normalize(word) for word in self.committed_text.split()[-5:]]
+        for n in range(min(len(tail), len(words)), 0, -1):
+            if tail[-n:] == [normalize(word[2]) for word in words[:n]]:
+                return words[n:]
+        return words
+
+    def _commit(self, words):
+        if not words:
+            return []
+        segment = TranscriptSegment(words[0][0], words[-1][1], " ".join(word[2] for word in words))
+        self.committed.append(segment)
+        self._committed_until = segment.end
+        return [segment]
+
+    def _trim(self):
+        """
+        Drop buffered audio that lies before the last committed word.
+        """
+        cut = int((self._committed_until - self._audio_start) * STREAM_RATE)
+        cut = max(0, min(cut, len(self._audio)))
+        if cut:
+            self._audio = self._audio[cut:].copy()
+            self._audio_start += cut / STREAM_RATE
@@ -0,0 +1,94 @@
+import threading
+import numpy as np
+from src.audio import resample_pcm
+from .base_transcriber import BaseTranscriber, TranscriptSegment
+
+WHISPER_RATE = 16000  # faster-whisper expects 16 kHz mono float32
+
+# Models are expensive to load, so each configuration is loaded once per
+# process and shared by every transcriber that asks for it.
+_models = {}
+_models_lock = threading.Lock()
+
+
+def default_device():
+    """
+    "cuda" when CTranslate2 can see a GPU, otherwise "cpu".
+    """
+    try:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def load_whisper_model(model_size, device, compute_type, num_workers=1):
+    key = (model_size, device, compute_type, num_workers)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            from faster_whisper import WhisperModel
+            model = WhisperModel(model_size, device=device, compute_type=compute_type, num_workers=num_workers)
+            _models[key] = model
+        return model
+
+
+class WhisperTranscriber(BaseTranscriber):
+    """
+    Local, offline transcription with faster-whisper.
+
+    Audio is passed to the model as a NumPy array, never via a file. The model
+    is loaded lazily on first use and reused across calls, turns and
+    transcriber instances. ``num_workers`` lets that many chunks decode in
+    parallel, matching the TranscriptionPipeline worker count.
+    """
+
+    def __init__(self, model_size=None, device=None, compute_type=None, language="en",
+                 beam_size=1, num_workers=1, partial_margin=0.3):
+        self.device = device or default_device()
+        self.model_size = model_size or ("medium.en" if self.device == "cuda" else "small.en")
+        self.compute_type = compute_type or ("float16" if self.device == "cuda" else "int8")
+        self.language = language
+        self.beam_size = beam_size
+        self.num_workers = num_workers
+        # A segment ending this close (in seconds) to the end of the audio may
+        # be cut mid-word and is reported as partial.
+        self.partial_margin = partial_margin
+
+    @property
+    def model(self):
+        return load_whisper_model(self.model_size, self.device, self.compute_type, self.num_workers)
+
+    def to_float(self, pcm, sample_rate):
+        """
+        int16 PCM at any rate -> mono float32 in [-1, 1) at 16 kHz
+        """
+        data = resample_pcm(pcm, sample_rate, WHISPER_RATE)
+        return data.astype(np.float32) / 32768.0
+
+    def stream(self, pcm, sample_rate, offset=0.0):
+        """
+        Yield TranscriptSegments as the model decodes them. Timestamps are
+        shifted by ``offset`` seconds so callers can keep absolute times.
+        """
+        audio = self.to_float(pcm, sample_rate)
+        if not len(audio):
+            return
+        duration = len(audio) / WHISPER_RATE
+        segments, _ = self.model.transcribe(
+            audio,
+            language=self.language,
+            beam_size=self.beam_size,
+            condition_on_previous_text=False,
+        )
+        # faster-whisper decodes lazily, so each segment is handed on as soon
+        # as it is ready rather than after the whole chunk.
+        for segment in segments:
+            text = segment.text.strip()
+            if not text:
+                continue
+            final = segment.end < duration - self.partial_margin
+            yield TranscriptSegment(offset + segment.start, offset + segment.end, text, final)
+
+    def transcribe(self, pcm, sample_rate):
+        return " ".join(segment.text for segment in self.stream(pcm, sample_rate))
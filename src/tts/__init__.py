@@ -0,0 +1,10 @@
+from .emotion import DEFAULT_VOICE, parse_sentence, tag_sentence
+from .playback_session import PlaybackSession
+from .synthesizer import BaseSynthesizer, EdgeSynthesizer
+from .speech_pipeline import BaseSpeechPipeline, SpeechPipeline
+from .async_speech_pipeline import AsyncSpeechPipeline
+
+__all__ = [
+    'DEFAULT_VOICE', 'parse_sentence', 'tag_sentence', 'PlaybackSession', 'BaseSynthesizer', 'EdgeSynthesizer',
+    'BaseSpeechPipeline', 'SpeechPipeline', 'AsyncSpeechPipeline',
+]
@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .speech_pipeline import BaseSpeechPipeline
+
+
+class AsyncSpeechPipeline(BaseSpeechPipeline):
+    """
+    Event-loop version of SpeechPipeline.
+
+    Synthesis and playback are two tasks on the shared loop joined by a
+    bounded asyncio queue, so up to ``lookahead`` sentences are rendered
+    ahead of the one playing. Sessions are awaited with
+    ``PlaybackSession.aget`` and edge-tts streams natively on the loop; only
+    MP3 decoding and the blocking writes to the output device leave it, the
+    latter on one dedicated thread.
+    """
+
+    def __init__(self, synthesizer, emotion_settings, lookahead=2, block_size=2048):
+        super().__init__(synthesizer, emotion_settings, block_size)
+        self.lookahead = lookahead
+        self.sessions = None  # asyncio queues, created on the loop
+        self.rendered = None
+        self._runtime = None
+        self._device = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playback")
+
+    def _queues(self):
+        if self.sessions is None:
+            self.sessions = asyncio.Queue()
+            self.rendered = asyncio.Queue(maxsize=self.lookahead)  # (session, pcm); None pcm ends a session
+
+    def start(self, runtime):
+        """
+        Run both stages on ``runtime`` (an EventLoopThread).
+        """
+        self._runtime = runtime
+        return runtime.submit(self.run())
+
+    async def run(self):
+        self._queues()
+        await asyncio.gather(self.synthesis_worker(), self.playback_worker())
+
+    def put(self, session):
+        """
+        Queue a PlaybackSession for speaking; safe from any thread.
+        """
+        self._runtime.call(self._enqueue, session)
+
+    def _enqueue(self, session):
+        self._queues()
+        self.sessions.put_nowait(session)
+
+    async def synthesis_worker(self):
+        while True:
+            session = await self.sessions.get()
+            if session is None:
+                await self.rendered.put((None, None))
+                break
+            while (item := await session.aget()) is not None:
+                try:
+                    pcm = await self.synthesizer.asynthesize(*self.voice(item))
+                except Exception as e:
+                    print(f"TTS Error: {e}")
+                    continue
+                if session.cancelled:
+                    break
+                # Waits while `lookahead` sentences are already rendered.
+                await self.rendered.put((session, pcm))
+            await self.rendered.put((session, None))
+
+    async def playback_worker(self):
+        import sounddevice as sd
+        loop = asyncio.get_running_loop()
+        stream = sd.OutputStream(samplerate=self.synthesizer.sample_rate, channels=1, dtype="int16")
+        stream.start()
+        try:
+            while True:
+                session, pcm = await self.rendered.get()
+                if session is None:
+                    break
+                for block in self.blocks(session, pcm):
+                    await loop.run_in_executor(self._device, stream.write, block)
+        finally:
+            stream.close()
+
+    def stop(self):
+        self.put(None)
@@ -0,0 +1,19 @@
+# Voice for emotions missing from the settings table (pyttsx3 conventions).
+DEFAULT_VOICE = {"rate": 180, "volume": 1.0}
+
+
+def tag_sentence(emotion, text):
+    """
+    A sentence as queued on a PlaybackSession: "emotion: text"
+    """
+    return f"{emotion}: {text}"
+
+
+def parse_sentence(item, emotion_settings):
+    """
+    Split a queued "emotion: text" item into (emotion, text, settings), where
+    settings are the rate and volume for that emotion.
+    """
+    emotion, _, text = item.partition(":")
+    emotion = emotion.strip().lower()
+    return emotion, text.strip(), emotion_settings.get(emotion, DEFAULT_VOICE)
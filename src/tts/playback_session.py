@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import threading
+from queue import Empty, Queue
+
+
+class PlaybackSession:
+    """
+    Speech output for one assistant turn.
+
+    Sentences are queued per session, so a turn can be abandoned as a unit:
+    ``cancel`` drops everything not yet spoken, interrupts the sentence being
+    spoken and runs the registered cancel callbacks, which is how the
+    cancellation reaches the upstream LLM stream. An optional TurnTrace
+    collects the turn's latency marks.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, trace=None):
+        self.id = next(self._ids)
+        self.trace = trace
+        self.queue = Queue()
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._callbacks = []
+        self._waiters = []  # (loop, asyncio.Event) of coroutines blocked in aget
+        self._lock = threading.Lock()
+        self.chunking_stats = None  # filled in by the segmenter when the turn ends
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def put(self, item):
+        """
+        Queue an item for playback. Ignored once the session is cancelled.
+        """
+        if not self.cancelled:
+            self.mark("first_sentence_queued")
+            self.queue.put(item)
+            self._wake()
+
+    def get(self):
+        """
+        Next item to play, or None once the session is cancelled, or finished
+        and drained.
+        """
+        while not self.cancelled:
+            try:
+                return self.queue.get(timeout=0.05)
+            except Empty:
+                if self._finished.is_set() and self.queue.empty():
+                    return None
+        return None
+
+    async def aget(self):
+        """
+        Coroutine version of ``get`` that waits without polling or tying up a
+        thread, for the event-loop TTS stage.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            while not self.cancelled:
+                waiter[1].clear()
+                try:
+                    return self.queue.get_nowait()
+                except Empty:
+                    if self._finished.is_set() and self.queue.empty():
+                        return None
+                await waiter[1].wait()
+            return None
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+
+    def _wake(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def mark(self, stage):
+        if self.trace is not None:
+            self.trace.mark(stage)
+
+    def end_trace(self):
+        """
+        Called by the TTS stage once the turn's last audio has played.
+        """
+        if self.trace is not None:
+            self.trace.mark("playback_done")
+            self.trace.end(cancelled=self.cancelled)
+
+    def finish(self):
+        """
+        Mark that no more items will be queued for this turn.
+        """
+        self._finished.set()
+        self._wake()
+
+    def flush(self):
+        """
+        Drop everything queued but not yet started.
+        """
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                return
+
+    def on_cancel(self, callback):
+        """
+        Register ``callback()`` to run when the session is cancelled. Runs
+        immediately if it already was.
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        """
+        Barge-in: stop this turn's speech and everything feeding it.
+        """
+        with self._lock:
+            if self.cancelled:
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        self.flush()
+        self._wake()
+        if self.trace is not None:
+            self.trace.end(cancelled=True)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback error: {e}")
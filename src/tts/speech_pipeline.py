@@ -0,0 +1,97 @@
+import threading
+from queue import Queue
+from .emotion import parse_sentence
+
+
+class BaseSpeechPipeline:
+    """
+    What the threaded and event-loop speech pipelines share: the voice for
+    each queued sentence, and playback of a rendered sentence in blocks.
+    """
+
+    def __init__(self, synthesizer, emotion_settings, block_size=2048):
+        self.synthesizer = synthesizer
+        self.emotion_settings = emotion_settings
+        self.block_size = block_size
+        self.speaking = False
+
+    def voice(self, item):
+        """
+        (text, rate, volume) to synthesize a queued "emotion: text" item with
+        """
+        _, text, settings = parse_sentence(item, self.emotion_settings)
+        return text, settings["rate"], settings["volume"]
+
+    def blocks(self, session, pcm):
+        """
+        The blocks of ``pcm`` to write to the device, stopping once
+        ``session`` is cancelled. A None ``pcm`` ends the session.
+        """
+        if pcm is None:
+            self.speaking = False
+            session.end_trace()
+            return
+        if session.cancelled:
+            return
+        self.speaking = True
+        session.mark("first_audio")
+        for start in range(0, len(pcm), self.block_size):
+            if session.cancelled:
+                break
+            yield pcm[start:start + self.block_size]
+
+
+class SpeechPipeline(BaseSpeechPipeline):
+    """
+    Two-stage text-to-speech: synthesis runs ahead of playback.
+
+    The synthesis stage takes PlaybackSessions from ``sessions`` in turn order
+    and renders each queued sentence to PCM while the previous one is still
+    playing. At most ``lookahead`` rendered sentences wait in memory. The
+    playback stage writes them back to back into one long-lived sounddevice
+    output stream, so there is no dead air between sentences. Audio is
+    written in short blocks so a cancelled session stops within a block.
+    """
+
+    def __init__(self, synthesizer, sessions, emotion_settings, lookahead=2, block_size=2048):
+        super().__init__(synthesizer, emotion_settings, block_size)
+        self.sessions = sessions
+        self.rendered = Queue(maxsize=lookahead)  # (session, pcm); None pcm ends a session
+        self._threads = []
+
+    def start(self):
+        for target in (self.synthesis_worker, self.playback_worker):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def synthesis_worker(self):
+        while True:
+            session = self.sessions.get()
+            if session is None:
+                self.rendered.put((None, None))
+                break
+            while (item := session.get()) is not None:
+                try:
+                    pcm = self.synthesizer.synthesize(*self.voice(item))
+                except Exception as e:
+                    print(f"TTS Error: {e}")
+                    continue
+                if session.cancelled:
+                    break
+                # Blocks while `lookahead` sentences are already waiting.
+                self.rendered.put((session, pcm))
+            self.rendered.put((session, None))
+
+    def playback_worker(self):
+        import sounddevice as sd
+        with sd.OutputStream(samplerate=self.synthesizer.sample_rate, channels=1, dtype="int16") as stream:
+            while True:
+                session, pcm = self.rendered.get()
+                if session is None:
+                    break
+                for block in self.blocks(session, pcm):
+                    stream.write(block)
+
+    def stop(self):
+        self.sessions.put(None)
@@ -0,0 +1,84 @@
+import asyncio
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+# Define the BaseSynthesizer abstract class
+class BaseSynthesizer(ABC):
+    """
+    Text-to-speech backend that renders a sentence to int16 mono PCM in
+    memory, ready to be written to an output stream.
+    """
+    sample_rate = 24000
+
+    @abstractmethod
+    def synthesize(self, text, rate=180, volume=1.0):
+        """
+        Return int16 PCM for ``text``. ``rate`` (words per minute) and
+        ``volume`` (1.0 = normal) follow the pyttsx3 conventions used by
+        EMOTION_SETTINGS.
+        """
+        pass
+
+    async def asynthesize(self, text, rate=180, volume=1.0):
+        """
+        Coroutine version of ``synthesize``; runs it on a worker thread unless
+        the backend has a native async path.
+        """
+        return await asyncio.to_thread(self.synthesize, text, rate, volume)
+
+
+class EdgeSynthesizer(BaseSynthesizer):
+    """
+    Neural voices through edge-tts. The MP3 stream is collected in memory and
+    decoded to PCM with miniaudio, without touching the disk.
+    """
+    sample_rate = 24000  # edge-tts always streams 24 kHz mono
+
+    def __init__(self, voice="en-US-AriaNeural", base_rate=180):
+        self.voice = voice
+        self.base_rate = base_rate  # words per minute that maps to "+0%"
+        self._loop = None
+
+    def prosody(self, rate, volume):
+        """
+        pyttsx3-style rate/volume -> edge-tts "+N%" adjustments
+        """
+        rate_pct = round((rate / self.base_rate - 1) * 100)
+        volume_pct = round((volume - 1) * 100)
+        return f"{rate_pct:+d}%", f"{volume_pct:+d}%"
+
+    async def render_mp3(self, text, rate=180, volume=1.0):
+        import edge_tts
+        rate, volume = self.prosody(rate, volume)
+        communicate = edge_tts.Communicate(text, self.voice, rate=rate, volume=volume)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio += chunk["data"]
+        return bytes(audio)
+
+    def decode(self, mp3):
+        import miniaudio
+        decoded = miniaudio.decode(
+            mp3, output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=1, sample_rate=self.sample_rate,
+        )
+        return np.frombuffer(decoded.samples, dtype=np.int16)
+
+    def synthesize(self, text, rate=180, volume=1.0):
+        # Synthesis runs on a dedicated worker thread; keep one event loop
+        # for it rather than creating a new one per sentence.
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        mp3 = self._loop.run_until_complete(self.render_mp3(text, rate, volume))
+        if not mp3:
+            return np.empty(0, dtype=np.int16)
+        return self.decode(mp3)
+
+    async def asynthesize(self, text, rate=180, volume=1.0):
+        # edge-tts is asyncio-native; only the MP3 decode leaves the loop.
+        mp3 = await self.render_mp3(text, rate, volume)
+        if not mp3:
+            return np.empty(0, dtype=np.int16)
+        return await asyncio.to_thread(self.decode, mp3)
@@ -1,15 +1,54 @@
+import os
+import asyncio
 import openai
 import pyttsx3
 import threading
-import re
 from queue import Queue
 from src.prompts.prompts import assistant_prompt, RAG_SEARCH_PROMPT_TEMPLATE  
+from src.tts import AsyncSpeechPipeline, EdgeSynthesizer, PlaybackSession, SpeechPipeline, parse_sentence, tag_sentence
+from src.llm import ChunkingPolicy, SentenceSegmenter
+from src.runtime import EventLoopThread
+from src.connections import use_aio_session
 
-# Global TTS engine setup
-tts_engine = pyttsx3.init()
-tts_engine.setProperty("rate", 180)
-voices = tts_engine.getProperty('voices')
-tts_engine.setProperty('voice', voices[0].id)  # Use first English voice
+# TTS backend. "edge" renders upcoming sentences with edge-tts while the
+# current one plays, for gap-free speech. "pyttsx3" uses the offline system
+# voice and speaks one sentence at a time. "none" starts no TTS stage; the
+# sessions on tts_queue are consumed externally (e.g. by the benchmarks).
+TTS_BACKEND = os.getenv("SOPHIE_TTS_BACKEND", "edge")
+EDGE_VOICE = os.getenv("SOPHIE_EDGE_VOICE", "en-US-AriaNeural")
+TTS_LOOKAHEAD = 2  # sentences synthesized ahead of playback
+
+# Async core: turns run as tasks on one shared event loop (async chat,
+# transcription and edge-tts) instead of a thread per turn. CHAT_TIMEOUT caps
+# how long one reply may stream before it is abandoned.
+ASYNC_CORE = os.getenv("SOPHIE_ASYNC_CORE", "0") == "1"
+CHAT_TIMEOUT = float(os.getenv("SOPHIE_CHAT_TIMEOUT", 60))
+# Print each turn's chunking stats; they are always saved on the turn trace.
+DEBUG_CHUNKING = os.getenv("SOPHIE_DEBUG_CHUNKING", "0") == "1"
+
+# Agent mode: replies come from an Agent with the assistant's tools and
+# conversation memory. Its text streams through the same sentence/TTS
+# pipeline as plain chat, and tool calls run while the reply is streaming.
+AGENT_MODE = os.getenv("SOPHIE_AGENT", "0") == "1"
+AGENT_MODEL = "gpt-4o-mini"
+
+# Latency-tuned chunking: the first chunk goes to TTS at the first clause
+# (or after a few tokens), later chunks grow toward full sentences.
+CHUNKING_POLICY = ChunkingPolicy(
+    first_min_chars=int(os.getenv("SOPHIE_FIRST_CHUNK_MIN_CHARS", 12)),
+    first_max_tokens=int(os.getenv("SOPHIE_FIRST_CHUNK_MAX_TOKENS", 12)),
+    clause_min_chars=40,
+    clause_growth=2.0,
+    max_clause_chars=160,
+)
+
+def init_pyttsx3_engine():
+    # Global TTS engine setup
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 180)
+    voices = engine.getProperty('voices')
+    engine.setProperty('voice', voices[0].id)  # Use first English voice
+    return engine
 
 EMOTION_SETTINGS = {
     "thoughtful": {"rate": 150, "volume": 0.9},
@@ -25,45 +64,70 @@ EMOTION_SETTINGS = {
     "neutral": {"rate": 180, "volume": 1.0}
 }
 
-EMOTION_TAG_PATTERN = re.compile(r'\[EMOTION\](.*?)\[/EMOTION\]')
-
-# Thread-safe queue for sentences
+# Thread-safe queue of playback sessions, one per turn, played in order.
 tts_queue = Queue()
 is_speaking = False
+current_session = None  # PlaybackSession being spoken
+tts_engine = None
+speech_pipeline = None
+runtime = EventLoopThread().start() if ASYNC_CORE else None
+agent = None
+
+# pyttsx3 can only be stopped safely from inside its own loop, so check for
+# barge-in at every word.
+def interrupt_if_cancelled(name, location, length):
+    if current_session is not None and current_session.cancelled:
+        tts_engine.stop()
 
 def tts_worker():
-    global is_speaking
+    global is_speaking, current_session
     while True:
-        text = tts_queue.get()
-        if text is None:
+        session = tts_queue.get()
+        if session is None:
             break
-        
-        # Extract emotion from text
-        emotion, _, clean_text = text.partition(":")
-        emotion = emotion.strip().lower()
-        
-        # Apply emotion settings
-        settings = EMOTION_SETTINGS.get(emotion, {"rate": 180, "volume": 1.0})
-        tts_engine.setProperty("rate", settings["rate"])
-        tts_engine.setProperty("volume", settings["volume"])
-        
-        is_speaking = True
-        try:
-            tts_engine.say(clean_text.strip())
-            tts_engine.runAndWait()
-        except Exception as e:
-            print(f"TTS Error: {e}")
-        is_speaking = False
+        current_session = session
 
-# Start TTS thread
-tts_thread = threading.Thread(target=tts_worker, daemon=True)
-tts_thread.start()
+        while (item := session.get()) is not None:
+            _, clean_text, settings = parse_sentence(item, EMOTION_SETTINGS)
+            tts_engine.setProperty("rate", settings["rate"])
+            tts_engine.setProperty("volume", settings["volume"])
 
-def stream_gpt4_response(command_text, callback):
+            is_speaking = True
+            session.mark("first_audio")
+            try:
+                tts_engine.say(clean_text)
+                tts_engine.runAndWait()
+            except Exception as e:
+                print(f"TTS Error: {e}")
+            is_speaking = False
+        session.end_trace()
+        current_session = None
+
+# Start the TTS stage for the configured backend
+if TTS_BACKEND == "pyttsx3":
+    tts_engine = init_pyttsx3_engine()
+    tts_engine.connect("started-word", interrupt_if_cancelled)
+    tts_thread = threading.Thread(target=tts_worker, daemon=True)
+    tts_thread.start()
+elif TTS_BACKEND == "edge" and ASYNC_CORE:
+    speech_pipeline = AsyncSpeechPipeline(EdgeSynthesizer(EDGE_VOICE), EMOTION_SETTINGS, lookahead=TTS_LOOKAHEAD)
+    speech_pipeline.start(runtime)
+elif TTS_BACKEND == "edge":
+    speech_pipeline = SpeechPipeline(EdgeSynthesizer(EDGE_VOICE), tts_queue, EMOTION_SETTINGS, lookahead=TTS_LOOKAHEAD)
+    speech_pipeline.start()
+
+def enqueue_session(session):
+    # Hand a turn to whichever TTS stage is running.
+    if isinstance(speech_pipeline, AsyncSpeechPipeline):
+        speech_pipeline.put(session)
+    else:
+        tts_queue.put(session)
+
+def chat_request(command_text):
     # Combine system prompt with task-specific instructions
     full_system_prompt = f"{assistant_prompt}\n\n{RAG_SEARCH_PROMPT_TEMPLATE}"
-    
-    response = openai.ChatCompletion.create(
+
+    return dict(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": full_system_prompt},
@@ -72,36 +136,162 @@ def stream_gpt4_response(command_text, callback):
         max_tokens=1000,
         stream=True
     )
-    
-    buffer = ""
-    current_emotion = "neutral"
-    
+
+def get_agent():
+    # Built on first use; the tools pull in the Google and search clients.
+    global agent
+    if agent is None:
+        from src.agents.agent import Agent
+        from src.tools.calendar.calendar_tool import CalendarTool
+        from src.tools.contacts import AddContactTool, FetchContactTool
+        from src.tools.emails.emailing_tool import EmailingTool
+        from src.tools.search import SearchWebTool
+        tools = [CalendarTool, AddContactTool, FetchContactTool, EmailingTool, SearchWebTool]
+        agent = Agent(name="Sophie", model=AGENT_MODEL, tools=tools, system_prompt=assistant_prompt)
+    return agent
+
+def open_chat_stream(command_text):
+    return openai.ChatCompletion.create(**chat_request(command_text))
+
+async def aopen_chat_stream(command_text):
+    use_aio_session()
+    return await openai.ChatCompletion.acreate(**chat_request(command_text))
+
+def stream_gpt4_response(command_text, callback, response=None, session=None):
+    # Everything spoken for this turn goes through one playback session, so
+    # cancelling it (barge-in) also stops the LLM stream below.
+    if session is None:
+        session = PlaybackSession()
+    enqueue_session(session)
+
+    # Reuse a stream that was already started (e.g. speculatively) if given.
+    session.mark("llm_request")
+    try:
+        # Opened inside the try: if the request fails, the session must still
+        # finish or the TTS stage waits on it forever.
+        if response is None and AGENT_MODE:
+            # Barge-in ends the agent turn early, so the next one is not held up.
+            stop = threading.Event()
+            session.on_cancel(stop.set)
+            response = get_agent().invoke_stream(command_text, stop=stop)
+        elif response is None:
+            response = open_chat_stream(command_text)
+        if hasattr(response, "cancel"):
+            session.on_cancel(response.cancel)
+        speak_response(response, callback, session)
+    finally:
+        if session.cancelled and hasattr(response, "close"):
+            response.close()  # stop reading so the abandoned answer stops costing tokens
+        session.finish()
+    return session
+
+def speak_response(response, callback, session):
+    # Incremental segmenter: each streamed token is scanned once, emotion
+    # tags are stripped even when split across tokens, and long sentences
+    # are cut at clauses so TTS can start early.
+    segmenter = SentenceSegmenter(CHUNKING_POLICY)
+    try:
+        feed_segmenter(response, callback, session, segmenter)
+    finally:
+        report_chunking(session, segmenter)
+
+def report_chunking(session, segmenter):
+    session.chunking_stats = stats = segmenter.stats()
+    if session.trace is not None:
+        session.trace.details["chunking"] = stats
+    if DEBUG_CHUNKING and stats["first_chunk_ms"] is not None:
+        print(f"Turn {session.id}: first chunk after {stats['first_chunk_ms']:.0f} ms "
+              f"({stats['first_chunk_tokens']} tokens, {stats['first_chunk_chars']} chars), "
+              f"{stats['chunks']} chunks")
+
+def feed_segmenter(response, callback, session, segmenter):
     for chunk in response:
-        if content := chunk.choices[0].delta.get("content", ""):
-            buffer += content
-            
-            # Extract and process emotion tags
-            emotion_match = EMOTION_TAG_PATTERN.search(buffer)
-            if emotion_match:
-                current_emotion = emotion_match.group(1).strip().lower()
-                buffer = EMOTION_TAG_PATTERN.sub('', buffer)  # Remove tags from text
-
-            # Split on sentence boundaries
-            while True:
-                match = re.search(r'[.!?]\s+', buffer)
-                if not match:
+        if session.cancelled:
+            return
+        feed_chunk(chunk, callback, session, segmenter)
+    flush_segmenter(callback, session, segmenter)
+
+def feed_chunk(chunk, callback, session, segmenter):
+    # Chat stream chunks, or plain text deltas from Agent.invoke_stream
+    content = chunk if isinstance(chunk, str) else chunk.choices[0].delta.get("content", "")
+    if content:
+        session.mark("first_token")
+        queue_sentences(segmenter.feed(content), callback, session)
+
+def flush_segmenter(callback, session, segmenter):
+    # The end of the reply: whatever the segmenter still holds is a sentence.
+    queue_sentences(segmenter.flush(), callback, session)
+
+def queue_sentences(sentences, callback, session):
+    for emotion, sentence in sentences:
+        callback(sentence)
+        session.put(tag_sentence(emotion, sentence))
+
+async def astream_gpt4_response(command_text, callback, session=None, timeout=CHAT_TIMEOUT):
+    # Event-loop version of stream_gpt4_response.
+    if session is None:
+        session = PlaybackSession()
+    enqueue_session(session)
+    return await stream_reply(command_text, callback, session, timeout)
+
+async def stream_reply(command_text, callback, session, timeout=CHAT_TIMEOUT):
+    # Stream one reply into ``session``, whoever speaks it. The reply runs as
+    # its own task, so barge-in and the timeout simply cancel it, which also
+    # closes the HTTP stream.
+    session.mark("llm_request")
+    segmenter = SentenceSegmenter(CHUNKING_POLICY)
+    loop = asyncio.get_running_loop()
+    reply = asyncio.ensure_future(afeed_segmenter(command_text, callback, session, segmenter))
+    session.on_cancel(lambda: loop.call_soon_threadsafe(reply.cancel))
+    try:
+        await asyncio.wait_for(reply, timeout)
+    except asyncio.TimeoutError:
+        print(f"Turn {session.id}: reply abandoned after {timeout:g} s")
+    except asyncio.CancelledError:
+        if not session.cancelled:
+            raise  # the caller was cancelled, not just this reply
+    finally:
+        report_chunking(session, segmenter)
+        session.finish()
+    return session
+
+async def afeed_segmenter(command_text, callback, session, segmenter):
+    response = agent_deltas(command_text) if AGENT_MODE else await aopen_chat_stream(command_text)
+    try:
+        async for chunk in response:
+            if session.cancelled:
+                return
+            feed_chunk(chunk, callback, session, segmenter)
+    finally:
+        await response.aclose()
+    flush_segmenter(callback, session, segmenter)
+
+async def agent_deltas(command_text):
+    # The agent and its tools are synchronous, so its stream is read on a
+    # worker thread and handed to the loop one delta at a time. Closing this
+    # generator (cancel or timeout) makes the thread close the agent stream.
+    loop = asyncio.get_running_loop()
+    deltas = asyncio.Queue()
+    stopped = threading.Event()
+
+    def pump():
+        stream = None
+        try:
+            stream = get_agent().invoke_stream(command_text, stop=stopped)
+            for delta in stream:
+                if stopped.is_set():
                     break
-                split_pos = match.end()
-                sentence = buffer[:split_pos].strip()
-                if sentence:
-                    # Add emotion prefix for TTS
-                    emotion_text = f"{current_emotion}: {sentence}"
-                    callback(sentence)
-                    tts_queue.put(emotion_text)
-                buffer = buffer[split_pos:]
-    
-    # Process remaining buffer
-    if buffer.strip():
-        emotion_text = f"{current_emotion}: {buffer.strip()}"
-        callback(buffer.strip())
-        tts_queue.put(emotion_text)
\ No newline at end of file
+                loop.call_soon_threadsafe(deltas.put_nowait, delta)
+        except Exception as e:
+            print(f"Agent Error: {e}")
+        finally:
+            if stream is not None:
+                stream.close()
+            loop.call_soon_threadsafe(deltas.put_nowait, None)
+
+    threading.Thread(target=pump, daemon=True).start()
+    try:
+        while (delta := await deltas.get()) is not None:
+            yield delta
+    finally:
+        stopped.set()